@@ -1,46 +1,362 @@
 from enum import Enum
+from heapq import heappop, heappush
+from itertools import combinations, count
+from typing import Mapping, Union
 import networkx as nx
-from core.types import DeadlockType
+import numpy as np
+from core.compact_graph import CompactGraph
+from core.matrix_backend import classify_matrix, peel
+from core.metrics import METRICS, timed
+from core.rag import ResourceAllocationGraph
+from core.types import DeadlockComponent, DeadlockType, ProcessCost, Resolution
+
+# Above this many processes in a component, greedy victims are not pruned afterwards
+# (each prune is an O(V + E) acyclicity check), so the set may not be minimal
+GREEDY_PRUNE_LIMIT = 5000
 
 class DeadlockDetector:
+    @timed("detect")
     def detect(self, graph: nx.DiGraph) -> DeadlockType:
         """Detect and classify deadlock type"""
         if not graph or not graph.edges:
             return DeadlockType.NONE
+        return self.classify(graph)
 
-        edges = list(graph.edges)
-        edges_set = set(edges)
+    def detect_matrix(self, matrix: np.ndarray) -> DeadlockType:
+        """Detect and classify deadlock type on a 0/1 adjacency matrix"""
+        return classify_matrix(matrix)
 
-        if any(u == v for u, v in edges):
-            return DeadlockType.MUTUAL_EXCLUSION
+    def deadlocked_mask(self, matrix: np.ndarray) -> np.ndarray:
+        """Processes left after peeling sources and sinks: on a cycle or between cycles"""
+        return peel(matrix)
 
-        if any((v, u) in edges_set for u, v in edges):
-            try:
-                nx.find_cycle(graph, orientation="original")
-                return DeadlockType.CIRCULAR_WAIT
-            except nx.NetworkXNoCycle:
-                return DeadlockType.NO_PREEMPTION
+    @timed("detect_multi_instance")
+    def detect_multi_instance(self, rag: ResourceAllocationGraph) -> list[str]:
+        """Deadlocked processes under multi-instance resources (work/finish detection)"""
+        return rag.deadlocked_processes()
 
-        try:
-            nx.find_cycle(graph, orientation="original")
-            return DeadlockType.CIRCULAR_WAIT
-        except nx.NetworkXNoCycle:
-            pass
+    @timed("classify")
+    def classify(self, graph: nx.DiGraph) -> DeadlockType:
+        """Classify deadlock type in a single iterative DFS over the graph.
+
+        Gives the same verdict as the rule chain self-loop > reciprocal edge
+        > cycle > hold-and-wait. A reciprocal edge is itself a cycle, so both
+        report CIRCULAR_WAIT.
+        """
+        succ = graph._succ  # raw adjacency dict; avoids a view object per lookup
+        state = {}  # 1 = on the DFS stack, 2 = finished
+        hold_and_wait = False
 
-        for u in graph.nodes:
-            outgoing = set(v for _, v in graph.out_edges(u))
-            incoming = set(v for v, _ in graph.in_edges(u))
-            if outgoing and incoming and u not in outgoing:
-                return DeadlockType.HOLD_AND_WAIT
+        for root in succ:
+            if root in state:
+                continue
+            nbrs = succ[root]
+            if root in nbrs:
+                return DeadlockType.MUTUAL_EXCLUSION
+            state[root] = 1
+            stack = [(root, iter(nbrs))]
+            while stack:
+                u, it = stack[-1]
+                for v in it:
+                    v_nbrs = succ[v]
+                    if v_nbrs:
+                        # u waits on v while v waits on someone else
+                        hold_and_wait = True
+                    seen = state.get(v)
+                    if seen is None:
+                        if v in v_nbrs:
+                            return DeadlockType.MUTUAL_EXCLUSION
+                        state[v] = 1
+                        stack.append((v, iter(v_nbrs)))
+                        break
+                    if seen == 1:
+                        # a cycle outranks everything but a self-loop, and a
+                        # self-loop check needs no traversal
+                        if any(n in succ[n] for n in succ):
+                            return DeadlockType.MUTUAL_EXCLUSION
+                        return DeadlockType.CIRCULAR_WAIT
+                else:
+                    state[u] = 2
+                    stack.pop()
 
+        if hold_and_wait:
+            return DeadlockType.HOLD_AND_WAIT
         return DeadlockType.NONE
 
+    @timed("find_deadlocks")
+    def find_deadlocks(self, graph: nx.DiGraph) -> list[DeadlockComponent]:
+        """Return every deadlocked component (cyclic SCC or self-loop) in one linear pass"""
+        return self.deadlocked_components(graph, self.strongly_connected_components(graph))
+
+    def deadlocked_components(self, graph: nx.DiGraph, sccs: list[list]) -> list[DeadlockComponent]:
+        """The deadlocked components among graph's already computed SCCs"""
+        succ = graph._succ
+        components = []
+        for scc in sccs:
+            if len(scc) == 1:
+                u = scc[0]
+                if u not in succ[u]:
+                    continue
+                components.append(DeadlockComponent((u,), ((u, u),)))
+                continue
+            components.append(DeadlockComponent(tuple(scc), self._cycle_within(succ, scc)))
+        return components
+
+    def strongly_connected_components(self, graph: nx.DiGraph) -> list[list]:
+        """Iterative Tarjan SCC over the raw adjacency, O(V + E)"""
+        succ = graph._succ
+        index = {}
+        low = {}
+        on_stack = set()
+        scc_stack = []
+        components = []
+        counter = 0
+
+        for root in succ:
+            if root in index:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            scc_stack.append(root)
+            on_stack.add(root)
+            stack = [(root, iter(succ[root]))]
+            while stack:
+                u, it = stack[-1]
+                for v in it:
+                    if v not in index:
+                        index[v] = low[v] = counter
+                        counter += 1
+                        scc_stack.append(v)
+                        on_stack.add(v)
+                        stack.append((v, iter(succ[v])))
+                        break
+                    if v in on_stack and index[v] < low[u]:
+                        low[u] = index[v]
+                else:
+                    stack.pop()
+                    if stack:
+                        parent = stack[-1][0]
+                        if low[u] < low[parent]:
+                            low[parent] = low[u]
+                    if low[u] == index[u]:
+                        component = []
+                        while True:
+                            w = scc_stack.pop()
+                            on_stack.discard(w)
+                            component.append(w)
+                            if w == u:
+                                break
+                        components.append(component)
+        return components
+
+    @staticmethod
+    def _cycle_within(succ, members) -> tuple:
+        """Walk in-component successors until a node repeats; every SCC node has one"""
+        member_set = set(members)
+        position = {}
+        path = []
+        u = members[0]
+        while u not in position:
+            position[u] = len(path)
+            path.append(u)
+            u = next(v for v in succ[u] if v in member_set and v != path[-1])
+        loop = path[position[u]:]
+        return tuple(zip(loop, loop[1:] + loop[:1]))
+
+    @timed("resolve")
     def resolve(self, graph: nx.DiGraph) -> str:
         """Attempt to resolve deadlock by breaking cycle"""
+        if isinstance(graph, CompactGraph):
+            cycle = graph.find_cycle()
+            if cycle is None:
+                return None
+            graph.remove_node(cycle[0][0])
+            return cycle[0][0]
         try:
-            cycle = nx.find_cycle(graph, orientation='original')
+            with METRICS.timer("find_cycle"):
+                cycle = nx.find_cycle(graph, orientation='original')
             process_to_remove = cycle[0][0]
             graph.remove_node(process_to_remove)
             return process_to_remove
         except nx.NetworkXNoCycle:
             return None
+
+    @timed("resolve_all")
+    def resolve_all(self, graph: nx.DiGraph) -> list:
+        """Preempt one process per deadlocked component until no deadlock remains"""
+        removed = []
+        components = self.find_deadlocks(graph)
+        while components:
+            for component in components:
+                victim = component.cycle[0][0]
+                graph.remove_node(victim)
+                removed.append(victim)
+            components = self.find_deadlocks(graph)
+        return removed
+
+    @timed("resolve_min_cost")
+    def resolve_min_cost(self, graph: nx.DiGraph,
+                         costs: Mapping[str, Union[float, ProcessCost]] = None,
+                         exact_limit: int = 12) -> Resolution:
+        """Preempt a cheap set of processes that breaks every cycle in one call.
+
+        Each deadlocked component is handled on its own: components of at most
+        exact_limit processes get a minimum-weight feedback vertex set by
+        enumeration, larger ones a greedy approximation. Missing costs count as 1.
+        Greedy sets are pruned of unneeded victims only up to GREEDY_PRUNE_LIMIT
+        processes; above it they may not be minimal.
+
+        passes_saved is counted, not estimated: resolve()'s one-victim-per-call
+        strategy is replayed on each component, and every call it would make
+        beyond this one is saved.
+        """
+        costs = costs or {}
+
+        def cost(p):
+            c = costs.get(p, 1.0)
+            return c.value if isinstance(c, ProcessCost) else float(c)
+
+        victims = []
+        exact = True
+        passes = 0
+        for component in self.find_deadlocks(graph):
+            members = set(component.processes)
+            succ = {u: {v for v in graph._succ[u] if v in members} for u in members}
+            passes += self._resolve_passes(succ)
+            if len(members) <= exact_limit:
+                victims.extend(self._exact_victims(succ, cost))
+            else:
+                exact = False
+                victims.extend(self._greedy_victims(succ, cost))
+
+        graph.remove_nodes_from(victims)
+        return Resolution(tuple(victims), sum(cost(v) for v in victims), max(passes - 1, 0), exact)
+
+    @staticmethod
+    def _resolve_passes(succ) -> int:
+        """How many calls resolve() makes on succ, each finding one cycle by DFS and removing one of its processes.
+
+        The process removed is the one whose wait closed the cycle, the top of
+        the DFS stack, so the search just resumes below it. A process whose
+        DFS finished without meeting a cycle stays clear of every later one
+        (removals only break cycles), so the whole replay is one O(V + E) DFS.
+        """
+        clear, removed = set(), set()
+        passes = 0
+        for root in succ:
+            if root in clear or root in removed:
+                continue
+            stack = [(root, iter(succ[root]))]
+            on_stack = {root}
+            while stack:
+                u, successors = stack[-1]
+                for v in successors:
+                    if v in clear or v in removed:
+                        continue
+                    if v in on_stack:
+                        # the cycle runs from v up the stack to u and back
+                        removed.add(u)
+                        passes += 1
+                        stack.pop()
+                        on_stack.discard(u)
+                    else:
+                        stack.append((v, iter(succ[v])))
+                        on_stack.add(v)
+                    break
+                else:
+                    stack.pop()
+                    on_stack.discard(u)
+                    clear.add(u)
+        return passes
+
+    @staticmethod
+    def _acyclic(succ, removed) -> bool:
+        """Kahn peeling of succ with the removed processes taken out"""
+        indegree = {u: 0 for u in succ if u not in removed}
+        for u in indegree:
+            for v in succ[u]:
+                if v in indegree:
+                    indegree[v] += 1
+        ready = [u for u, d in indegree.items() if d == 0]
+        peeled = 0
+        while ready:
+            u = ready.pop()
+            peeled += 1
+            for v in succ[u]:
+                if v in indegree:
+                    indegree[v] -= 1
+                    if indegree[v] == 0:
+                        ready.append(v)
+        return peeled == len(indegree)
+
+    def _exact_victims(self, succ, cost) -> list:
+        forced = [u for u in succ if u in succ[u]]
+        optional = sorted((u for u in succ if u not in succ[u]), key=cost)
+        best, best_cost = None, float("inf")
+        base = set(forced)
+        base_cost = sum(cost(u) for u in forced)
+        for size in range(len(optional) + 1):
+            for extra in combinations(optional, size):
+                total = base_cost + sum(cost(u) for u in extra)
+                if total >= best_cost:
+                    continue
+                removed = base.union(extra)
+                if self._acyclic(succ, removed):
+                    best, best_cost = removed, total
+        return sorted(best, key=list(succ).index)
+
+    def _greedy_victims(self, succ, cost) -> list:
+        original = {u: set(nbrs) for u, nbrs in succ.items()}
+        pred = {u: set() for u in succ}
+        for u, nbrs in succ.items():
+            for v in nbrs:
+                pred[v].add(u)
+        alive = set(succ)
+        victims = []
+        heap = []
+        tie = count()
+
+        def score(u):
+            # cheap processes that sit on many wait paths go first
+            return cost(u) / (len(succ[u]) * len(pred[u]))
+
+        def drop(u):
+            alive.discard(u)
+            for v in succ[u]:
+                pred[v].discard(u)
+            for v in pred[u]:
+                succ[v].discard(u)
+            return [v for v in succ[u] | pred[u] if v in alive]
+
+        def peel(candidates):
+            # processes without both an in- and an out-edge cannot lie on a cycle
+            queue = list(candidates)
+            while queue:
+                u = queue.pop()
+                if u not in alive:
+                    continue
+                if not succ[u] or not pred[u]:
+                    queue.extend(drop(u))
+                else:
+                    heappush(heap, (score(u), next(tie), u))
+
+        for u in [u for u in succ if u in succ[u]]:
+            drop(u)
+            victims.append(u)
+        peel(list(alive))
+        while heap:
+            key, _, u = heappop(heap)
+            if u not in alive or key != score(u):
+                continue  # stale entry; a fresher one was pushed
+            victims.append(u)
+            peel(drop(u))
+
+        # give back victims that turned out to be unnecessary, most expensive first
+        if len(original) > GREEDY_PRUNE_LIMIT:
+            return victims
+        kept = set(victims)
+        for u in sorted(victims, key=cost, reverse=True):
+            kept.discard(u)
+            if not self._acyclic(original, kept):
+                kept.add(u)
+        return [u for u in victims if u in kept]
@@ -0,0 +1,221 @@
+"""Deadlock avoidance: Banker's-algorithm admission control for resource requests.
+
+    avoider = BankersAvoider(processes, resources, total, maximum)
+    if avoider.request("P3", {"disk": 1}) is RequestOutcome.GRANTED:
+        ...
+
+Alongside Available and Need the avoider keeps one safe sequence and, for
+each position in it, the slack (work available at that point minus that
+process's need). Granting a request lowers only the slack of processes
+ahead of the requester, and only in the requested columns, so a decision
+is usually one comparison of that prefix against the request. When some
+process ahead cannot absorb the request, the requester may still move up
+to a point where the work in hand covers its whole need; everyone it
+overtakes then gets its allocation back sooner. A full Banker's pass runs
+only when neither works, to look for another sequence.
+"""
+from dataclasses import dataclass
+from typing import Mapping, Optional, Sequence, Union
+import numpy as np
+from core.rag import ResourceAllocationGraph
+from core.types import RequestOutcome
+
+Amounts = Union[Mapping[str, int], Sequence[int], np.ndarray]
+
+def safe_sequence(available: np.ndarray, allocation: np.ndarray, need: np.ndarray) -> Optional[np.ndarray]:
+    """Process ids in an order that lets every process finish, or None when the state is unsafe.
+
+    Each round runs every process whose need fits in work at once, as in
+    ResourceAllocationGraph.deadlocked.
+    """
+    work = available.copy()
+    finish = np.zeros(len(need), dtype=bool)
+    order = []
+    while True:
+        pending = np.flatnonzero(~finish)
+        if pending.size == 0:
+            return np.concatenate(order) if order else np.zeros(0, dtype=np.int64)
+        runnable = pending[(need[pending] <= work).all(axis=1)]
+        if runnable.size == 0:
+            return None
+        finish[runnable] = True
+        order.append(runnable)
+        work = work + allocation[runnable].sum(axis=0)
+
+@dataclass
+class AvoidanceStats:
+    granted: int = 0
+    waited: int = 0
+    refused: int = 0
+    fast_checks: int = 0  # settled against the cached safe sequence
+    full_checks: int = 0  # needed a full Banker's pass
+
+    @property
+    def decisions(self) -> int:
+        return self.granted + self.waited + self.refused
+
+class BankersAvoider:
+    """Grants a request only if the system stays in a safe state afterwards.
+
+    maximum[i, r] is the most of resource r process i will ever hold at
+    once (its declared claim); allocation defaults to nothing held.
+    """
+
+    def __init__(self, processes: Sequence[str], resources: Sequence[str], total, maximum,
+                 allocation=None):
+        self.processes = list(processes)
+        self.resources = list(resources)
+        self.index = {p: i for i, p in enumerate(self.processes)}
+        self.r_index = {r: j for j, r in enumerate(self.resources)}
+        shape = (len(self.processes), len(self.resources))
+        self.total = np.array(total, dtype=np.int64)
+        self.maximum = np.array(maximum, dtype=np.int64).reshape(shape)
+        self.allocation = (np.zeros(shape, dtype=np.int64) if allocation is None
+                           else np.array(allocation, dtype=np.int64).reshape(shape))
+        if self.total.shape != (len(self.resources),):
+            raise ValueError("total needs one instance count per resource")
+        if (self.maximum < 0).any() or (self.allocation < 0).any():
+            raise ValueError("maximum and allocation must be non-negative")
+        if (self.allocation > self.maximum).any():
+            raise ValueError("a process holds more than its maximum claim")
+        if (self.maximum > self.total).any():
+            raise ValueError("a maximum claim exceeds the instances that exist")
+        self.available = self.total - self.allocation.sum(axis=0)
+        if (self.available < 0).any():
+            raise ValueError("more instances allocated than exist")
+        self.need = self.maximum - self.allocation
+        self.stats = AvoidanceStats()
+        order = safe_sequence(self.available, self.allocation, self.need)
+        if order is None:
+            raise ValueError("the initial allocation is already unsafe")
+        self._set_order(order)
+
+    @classmethod
+    def from_rag(cls, rag: ResourceAllocationGraph, maximum=None) -> "BankersAvoider":
+        """Start from a resource model; claims default to what each process holds plus requests"""
+        if maximum is None:
+            maximum = rag.allocation + rag.request
+        return cls(rag.processes, rag.resources, rag.total, maximum, rag.allocation)
+
+    def request(self, process: str, amounts: Amounts) -> RequestOutcome:
+        """Decide one request; on GRANTED the instances are allocated to the process"""
+        i = self._process_id(process)
+        req = self._vector(amounts)
+        if (req > self.need[i]).any():
+            raise ValueError(f"{process} would exceed its maximum claim")
+        if (req > self.available).any():
+            self.stats.waited += 1
+            return RequestOutcome.WAIT
+        cols = np.flatnonzero(req)
+        if cols.size == 0:
+            self.stats.granted += 1
+            return RequestOutcome.GRANTED
+        ahead = self.rank[i]
+        wanted = req[cols]
+        short = (self.slack[:ahead, cols] < wanted).any(axis=1)
+        # first position that cannot give up the requested instances; i must run before it
+        limit = int(short.argmax()) if short.any() else ahead
+        if limit < ahead:
+            work = self.slack[:limit + 1] + self.need[self.order[:limit + 1]]
+            fits = np.flatnonzero((work >= self.need[i]).all(axis=1))
+            if fits.size:
+                self._move_up(i, int(fits[-1]), work[fits[-1]])
+        if self.rank[i] <= limit:
+            # the cached sequence still works: only the processes ahead of i see less work
+            self.stats.fast_checks += 1
+            self.slack[:self.rank[i], cols] -= wanted
+            self._allocate(i, req)
+        else:
+            self.stats.full_checks += 1
+            self._allocate(i, req)
+            order = safe_sequence(self.available, self.allocation, self.need)
+            if order is None:
+                self._allocate(i, -req)
+                self.stats.refused += 1
+                return RequestOutcome.UNSAFE
+            self._set_order(order)
+        self.stats.granted += 1
+        return RequestOutcome.GRANTED
+
+    def release(self, process: str, amounts: Amounts = None) -> None:
+        """Return instances (all the process holds by default); a release never makes a state unsafe"""
+        i = self._process_id(process)
+        rel = self.allocation[i].copy() if amounts is None else self._vector(amounts)
+        if (rel > self.allocation[i]).any():
+            raise ValueError(f"{process} cannot release more than it holds")
+        self._allocate(i, -rel)
+        cols = np.flatnonzero(rel)
+        self.slack[:self.rank[i], cols] += rel[cols]
+
+    def finish(self, process: str) -> None:
+        """The process is done: it releases everything and claims nothing further"""
+        i = self._process_id(process)
+        self.release(process)
+        self.slack[self.rank[i]] += self.need[i]
+        self.maximum[i] = 0
+        self.need[i] = 0
+
+    def admit(self, process: str, maximum: Amounts) -> None:
+        """Add a process holding nothing; it goes last in the safe sequence, after everyone has released"""
+        if process in self.index:
+            raise ValueError(f"{process} is already admitted")
+        claim = self._vector(maximum)
+        if (claim > self.total).any():
+            raise ValueError("a maximum claim exceeds the instances that exist")
+        self.index[process] = len(self.processes)
+        self.processes.append(process)
+        self.maximum = np.vstack([self.maximum, claim])
+        self.allocation = np.vstack([self.allocation, np.zeros_like(claim)])
+        self.need = np.vstack([self.need, claim])
+        self.rank = np.append(self.rank, len(self.order))
+        self.order = np.append(self.order, self.index[process])
+        self.slack = np.vstack([self.slack, self.total - claim])
+
+    def is_safe(self) -> bool:
+        """Full Banker's pass over the current state, independent of the cache"""
+        return safe_sequence(self.available, self.allocation, self.need) is not None
+
+    def _allocate(self, i: int, amounts: np.ndarray) -> None:
+        self.available -= amounts
+        self.allocation[i] += amounts
+        self.need[i] -= amounts
+
+    def _move_up(self, i: int, q: int, work: np.ndarray) -> None:
+        """Move process i from its place in the safe sequence to position q, before the request"""
+        p = self.rank[i]
+        # the processes i overtakes see its allocation released before their turn
+        self.slack[q + 1:p + 1] = self.slack[q:p] + self.allocation[i]
+        self.slack[q] = work - self.need[i]
+        self.order[q + 1:p + 1] = self.order[q:p]
+        self.order[q] = i
+        self.rank[self.order[q:p + 1]] = np.arange(q, p + 1)
+
+    def _set_order(self, order: np.ndarray) -> None:
+        self.order = order
+        self.rank = np.empty(len(order), dtype=np.int64)
+        self.rank[order] = np.arange(len(order))
+        # work each process sees in turn: Available plus what everyone before it released
+        held = self.allocation[order]
+        work = np.cumsum(held, axis=0) - held + self.available
+        self.slack = work - self.need[order]
+
+    def _process_id(self, process: str) -> int:
+        i = self.index.get(process)
+        if i is None:
+            raise ValueError(f"Unknown process {process!r}")
+        return i
+
+    def _vector(self, amounts: Amounts) -> np.ndarray:
+        if isinstance(amounts, Mapping):
+            vector = np.zeros(len(self.resources), dtype=np.int64)
+            for r, count in amounts.items():
+                if r not in self.r_index:
+                    raise ValueError(f"Unknown resource {r!r}")
+                vector[self.r_index[r]] = count
+        else:
+            vector = np.array(amounts, dtype=np.int64)
+            if vector.shape != (len(self.resources),):
+                raise ValueError("amounts need one count per resource")
+        if (vector < 0).any():
+            raise ValueError("amounts must be non-negative")
+        return vector
@@ -0,0 +1,90 @@
+"""Compare the single-pass classifier against the original multi-pass rule chain.
+
+Run with: python benchmarks/bench_classify.py [num_edges ...]
+"""
+import random
+import sys
+import time
+import networkx as nx
+from core.detector import DeadlockDetector
+from core.types import DeadlockType
+
+
+def multipass_detect(graph: nx.DiGraph) -> DeadlockType:
+    """The rule chain DeadlockDetector.detect used before the single-pass classifier"""
+    if not graph or not graph.edges:
+        return DeadlockType.NONE
+
+    edges = list(graph.edges)
+    edges_set = set(edges)
+
+    if any(u == v for u, v in edges):
+        return DeadlockType.MUTUAL_EXCLUSION
+
+    if any((v, u) in edges_set for u, v in edges):
+        try:
+            nx.find_cycle(graph, orientation="original")
+            return DeadlockType.CIRCULAR_WAIT
+        except nx.NetworkXNoCycle:
+            return DeadlockType.NO_PREEMPTION
+
+    try:
+        nx.find_cycle(graph, orientation="original")
+        return DeadlockType.CIRCULAR_WAIT
+    except nx.NetworkXNoCycle:
+        pass
+
+    for u in graph.nodes:
+        outgoing = set(v for _, v in graph.out_edges(u))
+        incoming = set(v for v, _ in graph.in_edges(u))
+        if outgoing and incoming and u not in outgoing:
+            return DeadlockType.HOLD_AND_WAIT
+
+    return DeadlockType.NONE
+
+
+def make_graph(kind: str, num_edges: int, seed: int = 0) -> nx.DiGraph:
+    rng = random.Random(seed)
+    n = max(3, num_edges // 2)
+    edges = set()
+    if kind == "reciprocal":
+        # a single 2-cycle between the last-visited nodes
+        edges.update({(n - 1, n - 2), (n - 2, n - 1)})
+    while len(edges) < num_edges:
+        u, v = rng.randrange(n), rng.randrange(n)
+        if u == v:
+            continue
+        if kind in ("dag", "reciprocal"):
+            # edges only go from lower to higher ids; worst case for the rule chain
+            u, v = min(u, v), max(u, v)
+        edges.add((u, v))
+    graph = nx.DiGraph()
+    graph.add_nodes_from(range(n))
+    graph.add_edges_from(edges)
+    return graph
+
+
+def best_of(fn, graph, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(graph)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(sizes):
+    detector = DeadlockDetector()
+    print(f"{'graph':<12}{'edges':>10}{'multipass s':>14}{'single s':>12}{'speedup':>9}  verdict")
+    for num_edges in sizes:
+        for kind in ("dag", "reciprocal", "random"):
+            graph = make_graph(kind, num_edges)
+            old_t, old = best_of(multipass_detect, graph)
+            new_t, new = best_of(detector.detect, graph)
+            assert old == new, (kind, num_edges, old, new)
+            print(f"{kind:<12}{num_edges:>10}{old_t:>14.4f}{new_t:>12.4f}{old_t / new_t:>8.1f}x  {new.name}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000])
@@ -0,0 +1,51 @@
+"""Partitioned detection against one detector over the merged graph, on hosts whose waits are mostly local.
+
+Run with: python benchmarks/bench_distributed.py [hosts processes_per_host cross_edges_per_mille]
+"""
+import pickle
+import sys
+import time
+import networkx as nx
+import numpy as np
+from core.detector import DeadlockDetector
+from core.distributed import PartitionedDetector, PartitionStats
+
+
+def host_graphs(hosts, per_host, cross, seed=0):
+    """(processes, edges) per host, about 1.5 waits per process; cross of every 1000 wait on another host"""
+    rng = np.random.default_rng(seed)
+    n = hosts * per_host
+    waiters = rng.integers(0, n, int(1.5 * n))
+    remote = rng.random(len(waiters)) < cross / 1000
+    local = waiters // per_host * per_host + rng.integers(0, per_host, len(waiters))
+    holders = np.where(remote, rng.integers(0, n, len(waiters)), local)
+    parts = [([f"P{i}" for i in range(h * per_host, (h + 1) * per_host)], []) for h in range(hosts)]
+    for u, v in zip(waiters.tolist(), holders.tolist()):
+        parts[u // per_host][1].append((f"P{u}", f"P{v}"))
+    return parts
+
+
+def main(hosts=8, per_host=25_000, cross=5):
+    parts = host_graphs(hosts, per_host, cross)
+    merged = nx.DiGraph()
+    for _, edges in parts:
+        merged.add_edges_from(edges)
+    start = time.perf_counter()
+    expected = DeadlockDetector().find_deadlocks(merged)
+    single = time.perf_counter() - start
+    with PartitionedDetector.spawn(parts) as coordinator:
+        coordinator.find_deadlocks()  # the first call also builds each partition's graph
+        coordinator.stats = PartitionStats(partitions=hosts)
+        found = coordinator.find_deadlocks()
+    assert {frozenset(c.processes) for c in found} == {frozenset(c.processes) for c in expected}
+    stats = coordinator.stats
+    shipped = sum(len(pickle.dumps(edges, pickle.HIGHEST_PROTOCOL)) for _, edges in parts)
+    print(f"{hosts} hosts x {per_host} processes, {merged.number_of_edges()} edges, "
+          f"{cross} per mille remote, {len(found)} deadlocks")
+    print(f"merged graph     {single * 1e3:>8.1f} ms   {shipped:>10} bytes to ship every edge")
+    print(f"partitioned      {stats.seconds * 1e3:>8.1f} ms   {stats.bytes_sent:>10} bytes exchanged "
+          f"({stats.summary_links} summary links)")
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,50 @@
+"""Compare the NumPy matrix backend against the NetworkX path on dense graphs.
+
+Run with: python benchmarks/bench_matrix.py [num_processes ...]
+"""
+import sys
+import time
+import numpy as np
+from core.detector import DeadlockDetector
+from core.graph_manager import GraphManager
+
+
+def make_matrix(kind: str, n: int, density: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    matrix = (rng.random((n, n)) < density).astype(np.uint8)
+    np.fill_diagonal(matrix, 0)
+    if kind in ("dag", "back_edge"):
+        # strictly upper triangular: acyclic, the worst case for peeling
+        matrix = np.triu(matrix, k=1)
+    if kind == "back_edge":
+        matrix[n - 1, 0] = 1
+    return matrix
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main(sizes, density=0.05):
+    detector = DeadlockDetector()
+    manager = GraphManager()
+    print(f"{'graph':<10}{'n':>6}{'edges':>10}{'nx build':>10}{'nx detect':>11}"
+          f"{'np build':>10}{'np detect':>11}  verdict")
+    for n in sizes:
+        processes = [f"P{i + 1}" for i in range(n)]
+        for kind in ("dag", "back_edge", "random"):
+            matrix = make_matrix(kind, n, density)
+            cells = np.where(matrix == 1, "1", "0").tolist()
+            nx_build, graph = timed(manager.build_from_table, cells, processes)
+            nx_detect, expected = timed(detector.detect, graph)
+            np_build, built = timed(manager.build_matrix, cells, processes)
+            np_detect, verdict = timed(detector.detect_matrix, built)
+            assert verdict == expected, (kind, n, verdict, expected)
+            print(f"{kind:<10}{n:>6}{int(matrix.sum()):>10}{nx_build:>10.3f}{nx_detect:>11.3f}"
+                  f"{np_build:>10.3f}{np_detect:>11.3f}  {verdict.name}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1000, 2000, 5000])
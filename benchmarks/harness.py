@@ -0,0 +1,273 @@
+"""Benchmark harness: time, peak memory and allocations per stage over seeded synthetic graphs.
+
+Run with:
+    python benchmarks/harness.py --sizes 5 1000 100000 --out results.json
+    python benchmarks/harness.py --compare old.json new.json
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import numpy as np
+from core.compact_graph import CompactGraph
+from core.detector import DeadlockDetector
+from core.graph_manager import GraphManager
+
+# Largest process count each stage is run at; beyond it the stage is skipped
+STAGE_LIMITS = {
+    "build_from_table": 2_000,  # the table is n x n cells
+    "build_from_edges": None,
+    "detect": None,
+    "find_deadlocks": None,
+    "resolve": None,
+    "resolve_min_cost": None,
+    "build_compact": None,
+    "detect_compact": None,
+    "find_deadlocks_compact": None,
+    "update_chart": 2_000,
+}
+DENSE_LIMIT = 3_000  # dense graphs hold ~n^2 / 10 edges
+
+
+def random_sparse(n, rng):
+    edges = set()
+    target = 2 * n
+    while len(edges) < target and n > 1:
+        u, v = rng.randrange(n), rng.randrange(n)
+        if u != v:
+            edges.add((u, v))
+    return edges
+
+
+def dense(n, rng):
+    return {(u, v) for u in range(n) for v in range(n) if u != v and rng.random() < 0.1}
+
+
+def many_small_cycles(n, rng):
+    edges = set()
+    for start in range(0, n - n % 3, 3):
+        edges.update({(start, start + 1), (start + 1, start + 2), (start + 2, start)})
+    return edges
+
+
+def giant_cycle(n, rng):
+    return {(i, (i + 1) % n) for i in range(n)} if n > 1 else set()
+
+
+def acyclic_chain(n, rng):
+    # every process both waits and is waited on: the worst case for the hold-and-wait scan
+    return {(i, i + 1) for i in range(n - 1)}
+
+
+def self_loops(n, rng):
+    edges = {(i, i) for i in range(0, n, 2)}
+    edges.update((i, i + 1) for i in range(n - 1))
+    return edges
+
+
+GENERATORS = {
+    "random_sparse": random_sparse,
+    "dense": dense,
+    "many_small_cycles": many_small_cycles,
+    "giant_cycle": giant_cycle,
+    "acyclic_chain": acyclic_chain,
+    "self_loops": self_loops,
+}
+
+
+# Live blocks are sampled at most this often during a traced run (sys.getallocatedblocks walks every arena)
+BLOCK_SAMPLE_SECONDS = 0.001
+
+
+def measure(fn):
+    """Wall time of one plain run, then peak bytes and block counts of a traced run.
+
+    peak_blocks is the most memory blocks live at once above the starting
+    count, sampled at Python calls and returns, so it counts allocations the
+    stage frees again; retained_blocks is the net change once it returns.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    fn()
+    wall = time.perf_counter() - start
+
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    peak_blocks = 0
+    next_sample = 0.0
+
+    def sample(frame, event, arg):
+        nonlocal peak_blocks, next_sample
+        now = time.perf_counter()
+        if now >= next_sample:
+            peak_blocks = max(peak_blocks, sys.getallocatedblocks() - blocks_before)
+            next_sample = now + BLOCK_SAMPLE_SECONDS
+
+    tracemalloc.start()
+    sys.setprofile(sample)
+    try:
+        fn()
+    finally:
+        sys.setprofile(None)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    retained = sys.getallocatedblocks() - blocks_before
+    return {
+        "seconds": wall,
+        "peak_bytes": peak,
+        "peak_blocks": max(peak_blocks, retained),
+        "retained_blocks": retained,
+    }
+
+
+def retained_bytes(build):
+    """Bytes still allocated once build() returns, i.e. the size of what it built"""
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    built = build()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+    return after - before
+
+
+def chart_window():
+    """An offscreen main window for timing update_chart, or None without PyQt6/matplotlib"""
+    try:
+        import os
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt6.QtWidgets import QApplication
+        from core.combinedallfiles import DeadlockDetectionAI
+    except ImportError:
+        return None
+    app = QApplication.instance() or QApplication([])
+    window = DeadlockDetectionAI()
+    window._bench_app = app
+    return window
+
+
+def run_stages(graph_name, n, seed, window):
+    rng = random.Random(seed)
+    edges = GENERATORS[graph_name](n, rng)
+    processes = [f"P{i + 1}" for i in range(n)]
+    manager = GraphManager()
+    detector = DeadlockDetector()
+    table = None
+    if n <= STAGE_LIMITS["build_from_table"]:
+        table = [["0"] * n for _ in range(n)]
+        for u, v in edges:
+            table[u][v] = "1"
+
+    def fresh_graph():
+        return GraphManager().build_from_edges(processes, edges)
+
+    graph = fresh_graph()
+    stages = {
+        "build_from_table": lambda: manager.build_from_table(table, processes),
+        "build_from_edges": fresh_graph,
+        "detect": lambda: detector.detect(graph),
+        "find_deadlocks": lambda: detector.find_deadlocks(graph),
+    }
+    # resolution mutates its graph, so each run gets a copy; the copy is timed too
+    stages["resolve"] = lambda: detector.resolve(graph.copy())
+    stages["resolve_min_cost"] = lambda: detector.resolve_min_cost(graph.copy())
+
+    pairs = np.array(sorted(edges), dtype=np.int64).reshape(-1, 2)
+    compact = CompactGraph.from_edges(processes, pairs[:, 0], pairs[:, 1])
+    stages["build_compact"] = lambda: CompactGraph.from_edges(processes, pairs[:, 0], pairs[:, 1])
+    stages["detect_compact"] = lambda: detector.detect(compact)
+    stages["find_deadlocks_compact"] = lambda: detector.find_deadlocks(compact)
+    if window is not None and n <= STAGE_LIMITS["update_chart"]:
+        # the table view shows the same graph, and as a loaded graph it is also the one risk is scored on
+        view = GraphManager()
+        view.build_from_edges(processes, edges)
+        view.track_risk()
+        window.graph_manager = view
+        window.loaded_graph = True
+        window.table_model.set_manager(view)
+
+        def update_chart():
+            window.deadlock_graph = graph
+            window.update_chart()
+        stages["update_chart"] = update_chart
+
+    results = {}
+    for stage, fn in stages.items():
+        limit = STAGE_LIMITS.get(stage)
+        if limit is not None and n > limit:
+            continue
+        results[stage] = measure(fn)
+    # The graph holds the names, so both figures include a share of the name table
+    per_edge = {
+        "networkx": retained_bytes(fresh_graph) / max(len(edges), 1),
+        "compact": retained_bytes(stages["build_compact"]) / max(len(edges), 1),
+    }
+    return {"graph": graph_name, "n": n, "edges": len(edges), "stages": results, "bytes_per_edge": per_edge}
+
+
+def run(sizes, graphs, seed):
+    window = chart_window()
+    runs = []
+    for graph_name in graphs:
+        for n in sizes:
+            if graph_name == "dense" and n > DENSE_LIMIT:
+                continue
+            record = run_stages(graph_name, n, seed, window)
+            runs.append(record)
+            stages = ", ".join(f"{k} {v['seconds'] * 1e3:.1f}ms" for k, v in record["stages"].items())
+            per_edge = record["bytes_per_edge"]
+            print(f"{graph_name:<18}{n:>9} edges={record['edges']:<9} {stages}; bytes/edge networkx "
+                  f"{per_edge['networkx']:.0f}, compact {per_edge['compact']:.0f}", flush=True)
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "runs": runs,
+    }
+
+
+def compare(old_path, new_path, threshold=1.2):
+    """Print stages whose time or peak memory grew by more than threshold x"""
+    with open(old_path) as f:
+        old = {(r["graph"], r["n"]): r["stages"] for r in json.load(f)["runs"]}
+    with open(new_path) as f:
+        new = {(r["graph"], r["n"]): r["stages"] for r in json.load(f)["runs"]}
+    regressions = 0
+    for key in sorted(old.keys() & new.keys()):
+        for stage in sorted(old[key].keys() & new[key].keys()):
+            for metric in ("seconds", "peak_bytes"):
+                before, after = old[key][stage][metric], new[key][stage][metric]
+                if before and after / before > threshold:
+                    regressions += 1
+                    print(f"REGRESSION {key[0]} n={key[1]} {stage} {metric}: {before:.4g} -> {after:.4g}"
+                          f" ({after / before:.2f}x)")
+    print(f"{regressions} regression(s) above {threshold:.2f}x")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 100, 1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--graphs", nargs="+", choices=sorted(GENERATORS), default=list(GENERATORS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_output.json")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args(argv)
+    if args.compare:
+        return compare(*args.compare)
+    results = run(args.sizes, args.graphs, args.seed)
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""Headless deadlock detection over graph files; prints one JSON object per file.
+
+Only the core modules are imported here, never PyQt or matplotlib, so this
+can run from scripts and cron jobs without a display.
+
+    python -m core.cli snapshot.csv dump.wfg
+    python -m core.cli --jobs 8 snapshots/*.wfg
+    python -m core.cli --save-snapshot big.wfgs big.csv   # then: python -m core.cli big.wfgs
+    python -m core.cli --metrics stages.prom --profile snapshots/*.wfg
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Union
+from core.detection_cache import DetectionCache
+from core.detector import DeadlockDetector
+from core.graph_manager import GraphManager
+from core.metrics import METRICS, profile_call
+from core.types import DeadlockType
+
+def components_json(components) -> list[dict]:
+    return [{"processes": list(c.processes), "cycle": [list(edge) for edge in c.cycle]} for c in components]
+
+def analyze(path: str, fmt: str = None, detector: Union[DeadlockDetector, DetectionCache] = None,
+            compact: bool = False) -> dict:
+    detector = detector or DeadlockDetector()
+    manager = GraphManager()
+    start = time.perf_counter()
+    graph = manager.load_compact(path, fmt) if compact else manager.load(path, fmt)
+    loaded = time.perf_counter()
+    deadlock_type = detector.detect(graph)
+    components = detector.find_deadlocks(graph) if deadlock_type != DeadlockType.NONE else []
+    done = time.perf_counter()
+    return {
+        "path": path,
+        "processes": graph.number_of_nodes(),
+        "edges": graph.number_of_edges(),
+        "deadlock_type": deadlock_type.name,
+        "deadlocks": components_json(components),
+        "load_seconds": round(loaded - start, 6),
+        "detect_seconds": round(done - loaded, 6),
+    }
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Detect deadlocks in wait-for graph files without the GUI")
+    parser.add_argument("paths", nargs="+", help="graph files (.csv, .jsonl, .wfg, .wfgs)")
+    parser.add_argument("--format", choices=["csv", "jsonl", "binary", "snapshot"],
+                        help="override the format inferred from each file extension")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="worker processes; above 1, results print as they complete")
+    parser.add_argument("--compact", action="store_true",
+                        help="hold each graph in flat arrays instead of networkx (for very large files)")
+    parser.add_argument("--save-snapshot", metavar="PATH",
+                        help="convert the one input file to a memory-mapped snapshot instead of analyzing it")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="record stage timings and write them here at the end (.json, else Prometheus text)")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile the first file's analysis (cProfile and tracemalloc) and print it to stderr")
+    return parser
+
+def save_snapshot(path: str, fmt: str, out: str) -> dict:
+    start = time.perf_counter()
+    graph = GraphManager().load_compact(path, fmt)
+    graph.save(out)
+    return {
+        "path": path,
+        "snapshot": out,
+        "processes": graph.number_of_nodes(),
+        "edges": graph.number_of_edges(),
+        "seconds": round(time.perf_counter() - start, 6),
+    }
+
+def run_batch(paths, fmt: str, jobs: int) -> int:
+    # imported here so single-process runs never load multiprocessing
+    from core.batch import BatchDetector
+    batch = BatchDetector(workers=jobs)
+    status = 0
+    for result in batch.run(paths, fmt):
+        if result.error:
+            record = {"path": result.key, "error": result.error}
+            status = 2
+        else:
+            record = {
+                "path": result.key,
+                "processes": result.processes,
+                "edges": result.edges,
+                "deadlock_type": result.deadlock_type.name,
+                "deadlocks": components_json(result.deadlocks),
+            }
+            if result.deadlock_type != DeadlockType.NONE and status == 0:
+                status = 1
+        print(json.dumps(record), flush=True)
+    stats = batch.stats
+    print(f"{stats.snapshots} snapshots in {stats.seconds:.2f}s ({stats.per_second:.1f} snapshots/s)",
+          file=sys.stderr)
+    return status
+
+def main(argv=None) -> int:
+    """Exit status: 0 when no file has a deadlock, 1 when any does, 2 on unreadable input"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.save_snapshot:
+        if len(args.paths) != 1:
+            parser.error("--save-snapshot takes exactly one input file")
+        try:
+            print(json.dumps(save_snapshot(args.paths[0], args.format, args.save_snapshot)), flush=True)
+        except (OSError, ValueError) as e:
+            print(json.dumps({"path": args.paths[0], "error": str(e)}), flush=True)
+            return 2
+        return 0
+    if args.metrics:
+        METRICS.enable()
+    if args.jobs > 1:
+        status = run_batch(args.paths, args.format, args.jobs)
+        if args.metrics:
+            METRICS.write(args.metrics)  # stages run in the workers, so only this process's are here
+        return status
+    # Snapshots often repeat; identical edge sets are classified once
+    detector = DetectionCache()
+    METRICS.gauge("cache_hits", lambda: detector.stats.hits)
+    METRICS.gauge("cache_misses", lambda: detector.stats.misses)
+    status = 0
+    for i, path in enumerate(args.paths):
+        try:
+            if args.profile and i == 0:
+                result, report = profile_call(analyze, path, args.format, detector, args.compact)
+                print(f"profile of {path}: {report}", file=sys.stderr)
+            else:
+                result = analyze(path, args.format, detector, args.compact)
+        except (OSError, ValueError) as e:
+            result = {"path": path, "error": str(e)}
+            status = 2
+        else:
+            if result["deadlock_type"] != DeadlockType.NONE.name and status == 0:
+                status = 1
+        print(json.dumps(result), flush=True)
+    stats = detector.stats
+    if len(args.paths) > 1:
+        print(f"result cache: {stats.hits} hits of {stats.hits + stats.misses} lookups ({stats.hit_rate:.0%})",
+              file=sys.stderr)
+    if args.metrics:
+        METRICS.write(args.metrics)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,124 @@
+import asyncio
+import bisect
+import os
 import sys
+import threading
+import time
 import networkx as nx
 import numpy as np
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QLabel, QVBoxLayout, QHBoxLayout,
-    QWidget, QTextEdit, QTableWidget, QTableWidgetItem, QHeaderView, QGraphicsDropShadowEffect
+    QWidget, QTextEdit, QTableView, QHeaderView, QGraphicsDropShadowEffect,
+    QFileDialog, QProgressBar, QSlider, QCheckBox
 )
 from PyQt6.QtGui import QFont, QColor, QBrush, QLinearGradient
-from PyQt6.QtCore import QTimer, Qt
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtSignal
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
+from matplotlib.transforms import Bbox
+from core.detection_cache import DetectionCache, GraphFingerprint
+from core.detector import DeadlockDetector
+from core.graph_manager import DEFAULT_PROCESSES, GraphManager
+from core.message_log import MessageLog
+from core.metrics import METRICS, profile_call, timed
+from core.monitor import DeadlockMonitor, tail_file
+from core.risk import FEATURES as RISK_FEATURES
+from core.table_model import WaitForTableModel
+from core.types import DeadlockType
+from core.workers import TaskRunner
+
+# Beyond this many processes the chart shows only the busiest ones
+CHART_TOP_K = 25
+# Up to this many processes the table columns stretch to fill the view
+STRETCH_LIMIT = 20
+# Queued messages reach the log widget this often, and it keeps this many paragraphs
+LOG_FLUSH_MS = 100
+LOG_MAX_BLOCKS = 5000
+# Graphs up to this many nodes plus edges are redrawn while the history slider is dragged
+HISTORY_LIVE_LIMIT = 20_000
+# The timings panel lists this many of the latest stage timings; profiles are saved under PROFILE_DIR
+TIMINGS_SHOWN = 6
+PROFILE_DIR = "logs"
+
+DEADLOCK_LABELS = {
+    DeadlockType.NONE: "No Deadlock",
+    DeadlockType.MUTUAL_EXCLUSION: "🔴 Mutual Exclusion Deadlock (Self-loop detected).",
+    DeadlockType.NO_PREEMPTION: "🟡 No Preemption Deadlock (Irreversible resource holding).",
+    DeadlockType.CIRCULAR_WAIT: "🟠 Circular Wait Deadlock (Processes waiting in a cycle).",
+    DeadlockType.HOLD_AND_WAIT: "🔵 Hold and Wait Deadlock (Processes holding resources and waiting).",
+}
+
+@timed("chart_series")
+def chart_series(graph, processes, k=CHART_TOP_K):
+    """Bar heights and per-process details for the chart; pure, so it can run off the GUI thread.
+
+    Only the k busiest processes are kept; "total" says how many there were.
+    Risk scores come later, on the GUI thread, for the shown processes only.
+    """
+    in_graph = [p for p in processes if p in graph]
+    out_degree = dict(graph.out_degree(in_graph))
+    in_degree = dict(graph.in_degree(in_graph))
+    # Series 1: Outgoing dependencies (how many processes Pi depends on)
+    waiting_on = [out_degree.get(p, 0) for p in processes]
+    # Series 2: Incoming dependencies (how many processes depend on Pi)
+    waited_by = [in_degree.get(p, 0) for p in processes]
+    shown = top_processes(waiting_on, waited_by, k)
+    names = [processes[i] for i in shown]
+    return {
+        "processes": names,
+        "total": len(processes),
+        "waiting_on": [waiting_on[i] for i in shown],
+        "waited_by": [waited_by[i] for i in shown],
+        # The processes each shown process is waiting on or waited by
+        "waiting_on_details": {p: list(graph.successors(p)) if p in graph else [] for p in names},
+        "waited_by_details": {p: list(graph.predecessors(p)) if p in graph else [] for p in names},
+    }
+
+def top_processes(waiting_on, waited_by, k):
+    """Indices of the k processes with the most wait edges, in table order; all of them when N <= k"""
+    n = len(waiting_on)
+    if n <= k:
+        return range(n)
+    load = np.asarray(waiting_on) + np.asarray(waited_by)
+    # stable sort so ties keep table order and the shown set does not flicker between refreshes
+    return np.sort(np.argsort(-load, kind="stable")[:k]).tolist()
+
+@timed("analyze")
+def analyze_graph(report, cache, graph, key, rag, chart_inputs):
+    """Detection work behind the Detect button; runs on a worker thread"""
+    report(5, "Classifying")
+    deadlock_type = DEADLOCK_LABELS[cache.detect(graph, key)]
+    report(35, "Finding deadlocked components")
+    components = cache.find_deadlocks(graph, key) if deadlock_type != "No Deadlock" else []
+    stuck = None
+    if rag is not None:
+        report(65, "Checking multi-instance resources")
+        stuck = cache.detector.detect_multi_instance(rag)
+    report(85, "Preparing chart")
+    series = chart_series(*chart_inputs)
+    report(100, "Done")
+    return {"deadlock_type": deadlock_type, "components": components, "stuck": stuck, "series": series}
+
+def profile_analysis(report, *args):
+    """analyze_graph under cProfile and tracemalloc; the report comes back under "profile"""
+    result, profile = profile_call(analyze_graph, report, *args)
+    result["profile"] = profile
+    return result
+
+@timed("fix")
+def resolve_graph(report, cache, graph, key, chart_inputs):
+    """Victim selection behind the Fix button; runs on a worker thread and mutates graph"""
+    report(10, "Selecting victims")
+    resolution = cache.resolve_min_cost(graph, key)
+    report(80, "Preparing chart")
+    series = chart_series(*chart_inputs)
+    report(100, "Done")
+    return {"resolution": resolution, "series": series}
+
+class MonitorBridge(QObject):
+    # Queued across threads: alerts raised in the monitor's asyncio thread land on the GUI thread
+    alert = pyqtSignal(str)
 
 class DeadlockDetectionAI(QMainWindow):
     def __init__(self):
@@ -22,6 +131,34 @@ class DeadlockDetectionAI(QMainWindow):
         """)
        
         self.deadlock_graph = nx.DiGraph()
+        self.detector = DeadlockDetector()
+        # Results by edge-set fingerprint: re-detecting an unchanged graph skips the work
+        self.cache = DetectionCache(self.detector)
+        self.deadlock_key = None
+        self.graph_manager = GraphManager()
+        self.graph_manager.record_history()
+        self.graph_manager.track_risk()
+        # Read-only manager the table shows while scrubbing back through history
+        self.history_view = GraphManager()
+        self.loaded_graph = False  # True while detection runs on a file instead of the table
+        self.monitor_bridge = MonitorBridge()
+        self.monitor_bridge.alert.connect(self.add_message)
+        self.monitor_thread = None
+        self.runner = TaskRunner()
+        self.log = MessageLog()
+        self.metrics_version = -1  # METRICS.version last shown in the timings panel
+        # Chart artists, kept between refreshes (see update_chart)
+        self.chart_axes = None
+        self.chart_bars = []
+        self.chart_legend = None
+        self.chart_background = None
+        self.chart_layout = None
+        self.chart_heights = ()
+        self.chart_ymax = 0
+        self.bar_lefts = []
+        self.bar_hits = []
+        self.bar_width = 0
+        self.bar_messages = {}
         self.initUI()
 
     def initUI(self):
@@ -53,11 +190,17 @@ class DeadlockDetectionAI(QMainWindow):
 
         # Left Half: Table and Buttons
         left_layout = QVBoxLayout()
-        self.table = QTableWidget(5, 5)
-        self.table.setHorizontalHeaderLabels(["P1", "P2", "P3", "P4", "P5"])
-        self.table.setVerticalHeaderLabels(["P1", "P2", "P3", "P4", "P5"])
+        # The table is a view over a graph, never a grid of items: the hand-edited
+        # 5 x 5 graph at first, the loaded graph (any size) after Load Graph
+        self.table_manager = GraphManager()
+        self.table_manager.build_from_edges(DEFAULT_PROCESSES, [])
+        self.table_manager.record_history()
+        self.table_manager.track_risk()
+        self.table_model = WaitForTableModel(self.table_manager)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: #FFFFFF;
                 color: black;
                 font-size: 14px;
@@ -69,10 +212,21 @@ class DeadlockDetectionAI(QMainWindow):
                 font-weight: bold;
             }
         """)
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.fit_table_headers()
+        self.table_model.edited.connect(self.on_table_edited)
         left_layout.addWidget(self.table)
 
+        # History scrubber: drag left to see the graph as it was before each change
+        history_layout = QHBoxLayout()
+        self.history_slider = QSlider(Qt.Orientation.Horizontal)
+        self.history_slider.valueChanged.connect(self.scrub_history)
+        history_layout.addWidget(self.history_slider, stretch=1)
+        self.history_label = QLabel("Now")
+        self.history_label.setStyleSheet("background: transparent; color: black;")
+        history_layout.addWidget(self.history_label)
+        left_layout.addLayout(history_layout)
+        self.refresh_history()
+
         # Buttons
         button_layout = QHBoxLayout()
         self.detect_button = QPushButton("Detect Deadlock")
@@ -99,7 +253,35 @@ class DeadlockDetectionAI(QMainWindow):
         self.fix_button.setGraphicsEffect(fix_shadow)
         button_layout.addWidget(self.fix_button)
 
+        self.load_button = QPushButton("Load Graph")
+        self.load_button.setStyleSheet(self.button_style("#5C6BC0"))  # Indigo
+        self.load_button.clicked.connect(self.load_graph)
+        load_shadow = QGraphicsDropShadowEffect()
+        load_shadow.setBlurRadius(15)
+        load_shadow.setXOffset(5)
+        load_shadow.setYOffset(5)
+        load_shadow.setColor(QColor(0, 0, 0, 100))
+        self.load_button.setGraphicsEffect(load_shadow)
+        button_layout.addWidget(self.load_button)
+
+        self.watch_button = QPushButton("Watch Events")
+        self.watch_button.setStyleSheet(self.button_style("#8D6E63"))  # Brown
+        self.watch_button.clicked.connect(self.watch_events)
+        watch_shadow = QGraphicsDropShadowEffect()
+        watch_shadow.setBlurRadius(15)
+        watch_shadow.setXOffset(5)
+        watch_shadow.setYOffset(5)
+        watch_shadow.setColor(QColor(0, 0, 0, 100))
+        self.watch_button.setGraphicsEffect(watch_shadow)
+        button_layout.addWidget(self.watch_button)
+
         left_layout.addLayout(button_layout)
+
+        # Progress of background detection/fix runs; hidden while idle
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setVisible(False)
+        left_layout.addWidget(self.progress_bar)
         two_part_layout.addLayout(left_layout, stretch=1)  # Left half takes 50% of the space
 
         # Right Half: Bar Chart and Message Log (split vertically)
@@ -117,6 +299,7 @@ class DeadlockDetectionAI(QMainWindow):
         """)
         # Connect click event for bar interaction
         self.canvas.mpl_connect('button_press_event', self.on_bar_click)
+        self.canvas.mpl_connect('draw_event', self.on_chart_draw)
         right_layout.addWidget(self.canvas, stretch=1)
         self.update_chart()
 
@@ -138,9 +321,36 @@ class DeadlockDetectionAI(QMainWindow):
         message_shadow.setYOffset(0)
         message_shadow.setColor(QColor(255, 255, 255, 200))  # White glow for neon effect
         self.message_log.setGraphicsEffect(message_shadow)
+        self.message_log.document().setMaximumBlockCount(LOG_MAX_BLOCKS)  # oldest paragraphs drop off
+        self.log_timer = QTimer(self)
+        self.log_timer.timeout.connect(self.flush_messages)
+        self.log_timer.start(LOG_FLUSH_MS)
         self.add_message("System initialized...")
         right_layout.addWidget(self.message_log, stretch=1)
 
+        # Timings panel: the latest stage latencies, refreshed with the log
+        timings_layout = QHBoxLayout()
+        self.timings_label = QLabel()
+        self.timings_label.setFont(QFont("Courier", 10))
+        self.timings_label.setStyleSheet("background: transparent; color: black;")
+        timings_layout.addWidget(self.timings_label, stretch=1)
+        timings_buttons = QVBoxLayout()
+        self.timings_box = QCheckBox("Record stage timings")
+        self.timings_box.setChecked(METRICS.enabled)
+        self.timings_box.setStyleSheet("background: transparent; color: black;")
+        self.timings_box.toggled.connect(self.record_timings)
+        timings_buttons.addWidget(self.timings_box)
+        self.profile_button = QPushButton("Profile next Detect")
+        self.profile_button.setCheckable(True)
+        self.profile_button.setToolTip(f"Run the next detection under cProfile and tracemalloc; the report is saved in {PROFILE_DIR}/")
+        timings_buttons.addWidget(self.profile_button)
+        self.export_button = QPushButton("Export metrics")
+        self.export_button.clicked.connect(self.export_metrics)
+        timings_buttons.addWidget(self.export_button)
+        timings_layout.addLayout(timings_buttons)
+        right_layout.addLayout(timings_layout)
+        self.refresh_timings()
+
         two_part_layout.addLayout(right_layout, stretch=1)  # Right half takes 50% of the space
 
         main_layout.addLayout(two_part_layout)
@@ -178,28 +388,49 @@ class DeadlockDetectionAI(QMainWindow):
         # Lighten the color by increasing its brightness
         return f"{color[:-2]}FF"
 
-    def update_chart(self):
-        # Include all 5 processes (P1 to P5)
-        self.processes = ["P1", "P2", "P3", "P4", "P5"]
-        # Series 1: Outgoing dependencies (how many processes Pi depends on)
-        self.series1 = [sum(1 for u, v in self.deadlock_graph.edges if u == p) for p in self.processes]
-        # Series 2: Incoming dependencies (how many processes depend on Pi)
-        self.series2 = [sum(1 for u, v in self.deadlock_graph.edges if v == p) for p in self.processes]
-        # Series 3: Placeholder (e.g., resource requests; set to 1 for now)
-        self.series3 = [1] * 5
-
-        # Store the processes each process is waiting on or waited by
-        self.waiting_on_details = {p: [] for p in self.processes}
-        self.waited_by_details = {p: [] for p in self.processes}
-        for u, v in self.deadlock_graph.edges:
-            if u in self.processes:
-                self.waiting_on_details[u].append(v)
-            if v in self.processes:
-                self.waited_by_details[v].append(u)
+    def chart_inputs(self):
+        # Everything chart_series needs, read on the GUI thread
+        return self.deadlock_graph, list(self.table_processes())
+
+    @timed("update_chart")
+    def update_chart(self, series=None):
+        # series comes precomputed from a worker thread; otherwise compute it here
+        if series is None:
+            series = chart_series(*self.chart_inputs())
+        self.processes = series["processes"]
+        self.series1 = series["waiting_on"]
+        self.series2 = series["waited_by"]
+        # Series 3: Deadlock risk, scored against the live graph (see core.risk)
+        self.series3 = self.active_manager().risk.scores(self.processes).tolist()
+        self.waiting_on_details = series["waiting_on_details"]
+        self.waited_by_details = series["waited_by_details"]
+        # Click messages are built on first use and only valid for this series
+        self.bar_messages = {}
+        total = series["total"]
+
+        top = max(max(self.series1, default=0), max(self.series2, default=0)) + 1
+        layout = (tuple(self.processes), total)
+        heights = (self.series1, self.series2, self.series3)
+        if (self.chart_background is not None and layout == self.chart_layout
+                and self.chart_ymax / 2 < top <= self.chart_ymax):
+            # Same bars and the axis still fits: redraw only the processes whose bars moved
+            changed = [i for i in range(len(self.processes))
+                       if any(new[i] != old[i] for new, old in zip(heights, self.chart_heights))]
+            self.chart_heights = heights
+            if changed:
+                self.blit_chart(changed)
+        else:
+            self.chart_layout = layout
+            self.chart_heights = heights
+            self.draw_chart(total, top)
 
+    def draw_chart(self, total, top):
+        """Full rebuild of the axes; the bars are animated so refreshes can blit them"""
         self.figure.clear()
         # Use 2D axes for a simpler, straight bar chart
         ax = self.figure.add_subplot(111)
+        # Risk is a probability, so it gets its own 0..1 axis on the right
+        risk_ax = ax.twinx()
         # Set a light background color for the plot area
         ax.set_facecolor('#F5F5F5')  # Light gray background
         self.figure.patch.set_alpha(0)
@@ -210,39 +441,50 @@ class DeadlockDetectionAI(QMainWindow):
         # Define colors with a slight gradient effect for a 3D-like appearance
         waiting_on_color = '#4682B4'  # Steel Blue
         waited_by_color = '#FF6347'   # Tomato
-        resources_held_color = '#3CB371'  # Medium Sea Green
-
-        # Plot 2D bars with enhanced shadows for a 3D-like effect
-        # Waiting On
-        bars1 = ax.bar(x - width, self.series1, width, label="Waiting On", color=waiting_on_color, edgecolor="black", zorder=2)
-        for bar in bars1:
-            bar.set_hatch('/')
-            # Add a shadow effect by plotting a slightly offset bar
-            ax.bar(bar.get_x() + 0.02, bar.get_height(), width, bottom=0, color="black", alpha=0.1, zorder=1)
-
-        # Waited By
-        bars2 = ax.bar(x, self.series2, width, label="Waited By", color=waited_by_color, edgecolor="black", zorder=2)
-        for bar in bars2:
-            bar.set_hatch('/')
-            ax.bar(bar.get_x() + 0.02, bar.get_height(), width, bottom=0, color="black", alpha=0.1, zorder=1)
-
-        # Resources Held
-        bars3 = ax.bar(x + width, self.series3, width, label="Resources Held", color=resources_held_color, edgecolor="black", zorder=2)
-        for bar in bars3:
-            bar.set_hatch('/')
-            ax.bar(bar.get_x() + 0.02, bar.get_height(), width, bottom=0, color="black", alpha=0.1, zorder=1)
+        risk_color = '#3CB371'  # Medium Sea Green
+
+        # Plot 2D bars with enhanced shadows for a 3D-like effect: one slightly offset
+        # translucent black container per series, drawn underneath
+        shadows = [
+            axes.bar(x + offset - width / 2 + 0.02, heights, width, color="black", alpha=0.1, zorder=1, animated=True)
+            for axes, offset, heights in ((ax, -width, self.series1), (ax, 0, self.series2),
+                                          (risk_ax, width, self.series3))
+        ]
+        bars = [
+            ax.bar(x - width, self.series1, width, label="Waiting On", color=waiting_on_color,
+                   edgecolor="black", hatch='/', zorder=2, animated=True),
+            ax.bar(x, self.series2, width, label="Waited By", color=waited_by_color,
+                   edgecolor="black", hatch='/', zorder=2, animated=True),
+            risk_ax.bar(x + width, self.series3, width, label="Deadlock Risk", color=risk_color,
+                        edgecolor="black", hatch='/', zorder=2, animated=True),
+        ]
+        self.chart_bars = shadows + bars
+
+        # Hit-test index for on_bar_click, rebuilt only with the layout: every bar's left
+        # edge in ascending order, and the (series, process) that bar belongs to
+        lefts = np.concatenate([x - 1.5 * width, x - 0.5 * width, x + 0.5 * width])
+        order = np.argsort(lefts, kind="stable")
+        self.bar_lefts = lefts[order].tolist()
+        self.bar_hits = [divmod(int(j), len(self.processes)) for j in order]
+        self.bar_width = width
 
         # Set labels and styling
+        title = "Process Dependency Analysis"
+        if total > len(self.processes):
+            title += f" (top {len(self.processes)} of {total})"
         ax.set_xticks(x)
         ax.set_xticklabels(self.processes, fontname="Arial", fontsize=12, color="black")
         ax.set_ylabel("Number of Dependencies", fontname="Arial", fontsize=12, color="black")
-        ax.set_title("Process Dependency Analysis", fontname="Arial", fontsize=14, pad=15, color="black")
-        ax.legend(prop={'family': 'Arial', 'size': 10}, facecolor='white', framealpha=0.8, loc='upper right')
+        ax.set_title(title, fontname="Arial", fontsize=14, pad=15, color="black")
+        self.chart_legend = risk_ax.legend(handles=bars, prop={'family': 'Arial', 'size': 10}, facecolor='white', framealpha=0.8, loc='upper right')
 
-        # Set limits with extra padding
+        # Set limits with extra padding; the headroom lets heights grow without a relayout
         ax.set_xlim(-0.5, len(self.processes) - 0.5)
-        max_height = max(max(self.series1, default=0), max(self.series2, default=0), max(self.series3, default=0)) + 1
-        ax.set_ylim(0, max_height)
+        self.chart_ymax = top + max(1, top // 4)
+        ax.set_ylim(0, self.chart_ymax)
+        risk_ax.set_ylim(0, 1.25)  # same headroom, so the legend clears a full-risk bar
+        risk_ax.set_yticks([0, 0.25, 0.5, 0.75, 1])
+        risk_ax.set_ylabel("Deadlock Risk", fontname="Arial", fontsize=12, color="black")
 
         # Add a light grid for better readability
         ax.yaxis.grid(True, linestyle='--', alpha=0.7, color='gray')
@@ -251,72 +493,133 @@ class DeadlockDetectionAI(QMainWindow):
         # Ensure text and spines are visible against the gradient
         ax.tick_params(axis='x', colors='black')
         ax.tick_params(axis='y', colors='black')
+        risk_ax.tick_params(axis='y', colors='black')
         for spine in ax.spines.values():
             spine.set_color('black')
             spine.set_linewidth(0.5)
 
-        # Store bar positions for click detection
-        self.bars = [
-            (x - width, self.series1, "Waiting On"),
-            (x, self.series2, "Waited By"),
-            (x + width, self.series3, "Resources Held")
-        ]
+        self.chart_axes = ax
+        self.risk_axes = risk_ax
+        # Triggers on_chart_draw, which grabs the background and blits the bars
         self.canvas.draw()
 
+    def on_chart_draw(self, event):
+        # Any full draw (first paint, resize, rebuild) invalidates the saved background
+        if self.chart_axes is None:
+            return
+        self.chart_background = self.canvas.copy_from_bbox(self.figure.bbox)
+        # The canvas paints its buffer once the draw returns, so no blit is needed here
+        self.draw_bars(range(len(self.processes)))
+
+    def draw_bars(self, indices):
+        ax = self.chart_axes
+        for container, heights in zip(self.chart_bars, self.chart_heights * 2):
+            for i in indices:
+                container[i].set_height(heights[i])
+                ax.draw_artist(container[i])
+        # The legend is part of the background; paste its pixels back over any bar under it
+        legend = self.chart_legend.get_window_extent()
+        self.canvas.restore_region(self.chart_background, bbox=legend.extents.tolist(), xy=(0, 0))
+        return legend
+
+    def blit_chart(self, changed):
+        """Redraw only the changed processes' bars over the saved background"""
+        columns = []
+        for i in changed:
+            # A process's three bars and their shadows sit within +-0.4 of its tick, so the
+            # unit-wide slot around it can be wiped back to the background on its own
+            x0, x1 = self.chart_axes.transData.transform([(i - 0.5, 0), (i + 0.5, 0)])[:, 0]
+            column = Bbox.from_extents(x0, 0, x1, self.figure.bbox.y1)
+            self.canvas.restore_region(self.chart_background, bbox=column.extents.tolist(), xy=(0, 0))
+            columns.append(column)
+        legend = self.draw_bars(changed)
+        self.canvas.blit(Bbox.union([*columns, legend]))
+
     def on_bar_click(self, event):
         # Check if a bar was clicked
-        if event.inaxes:
-            x, y = event.xdata, event.ydata
-            if x is None or y is None:
-                return
-
-            for bar_x, heights, label in self.bars:
-                for i, (bx, h) in enumerate(zip(bar_x, heights)):
-                    # Check if the click is within the bar's bounds
-                    if abs(x - bx) < 0.15 and y >= 0 and y <= h:
-                        process = self.processes[i]
-                        # Detailed message based on the bar type
-                        if label == "Waiting On":
-                            waiting_on = self.waiting_on_details[process]
-                            message = (
-                                f"📊 <b>Process {process} - Waiting On Details:</b><br>"
-                                f"🔹 <b>Count:</b> {int(h)} process{'es' if h != 1 else ''}<br>"
-                                f"🔹 <b>Definition:</b> This indicates the number of processes that {process} is waiting for to release resources.<br>"
-                                f"🔹 <b>Processes:</b> {', '.join(waiting_on) if waiting_on else 'None'}"
-                            )
-                        elif label == "Waited By":
-                            waited_by = self.waited_by_details[process]
-                            message = (
-                                f"📊 <b>Process {process} - Waited By Details:</b><br>"
-                                f"🔹 <b>Count:</b> {int(h)} process{'es' if h != 1 else ''}<br>"
-                                f"🔹 <b>Definition:</b> This indicates the number of processes that are waiting for {process} to release resources.<br>"
-                                f"🔹 <b>Processes:</b> {', '.join(waited_by) if waited_by else 'None'}"
-                            )
-                        else:  # Resources Held
-                            message = (
-                                f"📊 <b>Process {process} - Resources Held Details:</b><br>"
-                                f"🔹 <b>Count:</b> {int(h)} resource{'s' if h != 1 else ''}<br>"
-                                f"🔹 <b>Definition:</b> This indicates the number of resources currently held by {process}.<br>"
-                                f"🔹 <b>Note:</b> This is a placeholder metric and may be updated with actual resource data."
-                            )
-                        self.add_message(message)
-                        return
+        if not event.inaxes or event.xdata is None or event.ydata is None:
+            return
+        x = event.xdata
+        # The last bar starting at or before x is the only one that can contain it
+        j = bisect.bisect_right(self.bar_lefts, x) - 1
+        if j < 0 or x > self.bar_lefts[j] + self.bar_width:
+            return
+        series, i = self.bar_hits[j]
+        h = (self.series1, self.series2, self.series3)[series][i]
+        # The event reports y on the topmost (risk) axes; each series is measured on its own
+        axes = self.risk_axes if series == 2 else self.chart_axes
+        y = axes.transData.inverted().transform((event.x, event.y))[1]
+        if 0 <= y <= h:
+            if (series, i) not in self.bar_messages:
+                self.bar_messages[series, i] = self.bar_message(series, self.processes[i], h)
+            self.add_message(self.bar_messages[series, i])
+
+    def bar_message(self, series, process, h):
+        # Detailed message based on the bar type
+        if series == 0:  # Waiting On
+            waiting_on = self.waiting_on_details[process]
+            return (
+                f"📊 <b>Process {process} - Waiting On Details:</b><br>"
+                f"🔹 <b>Count:</b> {int(h)} process{'es' if h != 1 else ''}<br>"
+                f"🔹 <b>Definition:</b> This indicates the number of processes that {process} is waiting for to release resources.<br>"
+                f"🔹 <b>Processes:</b> {', '.join(waiting_on) if waiting_on else 'None'}"
+            )
+        if series == 1:  # Waited By
+            waited_by = self.waited_by_details[process]
+            return (
+                f"📊 <b>Process {process} - Waited By Details:</b><br>"
+                f"🔹 <b>Count:</b> {int(h)} process{'es' if h != 1 else ''}<br>"
+                f"🔹 <b>Definition:</b> This indicates the number of processes that are waiting for {process} to release resources.<br>"
+                f"🔹 <b>Processes:</b> {', '.join(waited_by) if waited_by else 'None'}"
+            )
+        # Deadlock Risk
+        features = dict(zip(RISK_FEATURES, self.active_manager().risk.features([process])[0]))
+        proximity = features["cycle_proximity"]
+        if proximity == 1:
+            nearest = "already in a deadlock"
+        elif proximity == 0:
+            nearest = "no deadlock downstream"
+        else:
+            hops = round(1 / proximity) - 1
+            nearest = f"{hops} wait{'s' if hops != 1 else ''} from a deadlock"
+        held = ""
+        if self.loaded_graph and self.graph_manager.rag is not None:
+            count = self.graph_manager.resources_held([process])[0]
+            held = f"<br>🔹 <b>Resources held:</b> {count} instance{'s' if count != 1 else ''}"
+        return (
+            f"📊 <b>Process {process} - Deadlock Risk Details:</b><br>"
+            f"🔹 <b>Risk:</b> {h:.0%}<br>"
+            f"🔹 <b>Definition:</b> The model's estimate that {process} will be deadlocked soon.<br>"
+            f"🔹 <b>Based on:</b> waits on {int(features['waiting_on'])}, waited on by {int(features['waited_by'])}, "
+            f"{int(features['reciprocal'])} mutual, {nearest}, oldest wait {features['wait_age']:.1f}s"
+            f"{held}"
+        )
 
     def add_message(self, msg):
         # Format the message with HTML to apply different styles
+        kind = "info"
         if "System initialized" in msg:
+            kind = "system"
             formatted_msg = f'<p style="font-family: \'Big Shoulders Display\', Arial Black; font-size: 16px; font-weight: bold; color: black;">{msg}</p>'
         elif "No Deadlock Detected" in msg:
             formatted_msg = f'<p style="font-family: \'Big Shoulders Display\', Arial Black; font-size: 16px; font-weight: bold; color: black;">✅ {msg}</p>'
         elif "Deadlock Resolved" in msg:
+            kind = "resolved"
             formatted_msg = f'<p style="font-family: \'Big Shoulders Display\', Arial Black; font-size: 16px; font-weight: bold; color: black;">✅ {msg}</p>'
         elif "No valid process dependencies found" in msg or "No deadlock to fix" in msg:
             formatted_msg = f'<p style="font-family: \'Big Shoulders Display\', Arial Black; font-size: 16px; font-weight: bold; color: black;">{msg}</p>'
+        elif any(tag in msg for tag in ("Graph loaded", "Could not load graph", "Resource check", "Live monitor",
+                                        "Profile", "Metrics", "Task failed")):
+            if msg.startswith("Live monitor: deadlock"):
+                kind = "deadlock"
+            formatted_msg = f'<p style="font-family: Arial; font-size: 14px; color: black;">{msg}</p>'
         elif "📊" in msg:  # Histogram bar click message
+            kind = "chart"
             # Style the histogram message with a blue title and detailed formatting
             formatted_msg = f'<p style="font-family: Arial; font-size: 14px; color: #1E90FF;">{msg}</p>'
         else:
             # Deadlock detected message with highlighted type
+            kind = "deadlock"
             lines = msg.split('\n')
             deadlock_type = lines[0].split("Type: ")[1].split("\n")[0]
             formatted_lines = [
@@ -328,38 +631,245 @@ class DeadlockDetectionAI(QMainWindow):
             ]
             formatted_msg = "".join(formatted_lines)
        
-        self.message_log.append(formatted_msg)
+        # Shown on the next flush, together with anything else queued by then
+        self.log.add(kind, msg, formatted_msg)
+
+    def flush_messages(self):
+        self.refresh_timings()
+        messages, skipped = self.log.drain()
+        if not messages:
+            return
+        if skipped:
+            messages.insert(0, f'<p style="font-family: Arial; font-size: 14px; color: gray;">… {skipped} earlier message{"s" if skipped != 1 else ""} not shown (see the log file).</p>')
+        self.message_log.append("".join(messages))
         self.message_log.ensureCursorVisible()
 
+    def record_timings(self, on):
+        # METRICS is process-wide and off by default; the gauges read the stats object, not this window
+        METRICS.enable(on)
+        if on:
+            stats = self.cache.stats
+            METRICS.gauge("cache_hits", lambda: stats.hits)
+            METRICS.gauge("cache_misses", lambda: stats.misses)
+
+    def refresh_timings(self):
+        # Redrawn only when a stage was timed since the last refresh
+        if METRICS.version == self.metrics_version:
+            return
+        self.metrics_version = METRICS.version
+        recent = METRICS.last(TIMINGS_SHOWN)
+        if not recent:
+            self.timings_label.setText("No stage timings yet")
+            return
+        self.timings_label.setText("\n".join(
+            f"{time.strftime('%H:%M:%S', time.localtime(stamp))} {stage:<16} {seconds * 1e3:9.2f} ms"
+            for stamp, stage, seconds in reversed(recent)
+        ))
+
+    def export_metrics(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Metrics", "deadlock_metrics.prom", "Prometheus text (*.prom *.txt);;JSON (*.json)"
+        )
+        if not path:
+            return
+        try:
+            METRICS.write(path)
+        except OSError as e:
+            self.add_message(f"Metrics export failed: {e}")
+            return
+        self.add_message(f"Metrics exported to {path}")
+
+    def save_profile(self, profile):
+        path = os.path.join(PROFILE_DIR, time.strftime("profile-%Y%m%d-%H%M%S.txt"))
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(str(profile))
+        except OSError as e:
+            self.add_message(f"Profile not saved: {e}")
+            return
+        self.add_message(
+            f"Profile saved to {path}: {profile.seconds * 1e3:.1f} ms, peak traced memory {profile.peak_bytes / 1e6:.1f} MB"
+        )
+
+    def table_processes(self):
+        # Row labels of the table, which may be the whole of a large loaded graph
+        return self.table_model.processes
+
+    @timed("copy_table")
     def get_table_data(self):
-        graph = nx.DiGraph()
-        processes = ["P1", "P2", "P3", "P4", "P5"]
-       
-        for i in range(5):
-            for j in range(5):
-                item = self.table.item(i, j)
-                if item and item.text() == "1":
-                    graph.add_edge(processes[i], processes[j])
-       
-        return graph
-   
+        # A copy, so a worker can resolve it while the table stays editable
+        return self.table_manager.get_graph().copy()
+
+    def fit_table_headers(self):
+        # Stretching needs every section's size; past a few dozen columns use fixed ones
+        mode = (QHeaderView.ResizeMode.Stretch if len(self.table_model.processes) <= STRETCH_LIMIT
+                else QHeaderView.ResizeMode.Fixed)
+        self.table.horizontalHeader().setSectionResizeMode(mode)
+        self.table.verticalHeader().setSectionResizeMode(mode)
+
+    def load_graph(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Load Wait-For Graph", "",
+            "Graph files (*.csv *.jsonl *.ndjson *.wfg *.wfgs *.bin);;Resource models (*.json)"
+        )
+        if not path:
+            return
+        if self.detect_button.isEnabled():
+            self.runner.cancel()  # a detection of the old graph is now stale
+            self.fix_button.setEnabled(True)
+            self.progress_bar.setVisible(False)
+        try:
+            if path.lower().endswith(".json"):
+                graph = self.graph_manager.load_rag(path)
+            else:
+                graph = self.graph_manager.load(path)
+        except (OSError, ValueError) as e:
+            self.add_message(f"Could not load graph: {e}")
+            return
+        self.loaded_graph = True
+        self.table_model.set_manager(self.graph_manager)
+        self.fit_table_headers()
+        self.refresh_history()
+        self.add_message(
+            f"Graph loaded: {graph.number_of_nodes()} processes, {graph.number_of_edges()} wait-for edges."
+        )
+
+    def watch_events(self):
+        if self.monitor_thread is not None and self.monitor_thread.is_alive():
+            self.add_message("Live monitor: already watching an event stream.")
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Watch Lock Event Log or Pipe", "", "All files (*)")
+        if not path:
+            return
+        monitor = DeadlockMonitor(alerts=[self.monitor_bridge.alert.emit, print], cadence=5.0)
+
+        def run():
+            # The asyncio loop lives in its own thread so the Qt event loop never blocks on it
+            try:
+                asyncio.run(monitor.run(tail_file(path)))
+            except (OSError, ValueError) as e:
+                self.monitor_bridge.alert.emit(f"Live monitor: stopped watching {path}: {e}")
+
+        self.monitor_thread = threading.Thread(target=run, name="deadlock-monitor", daemon=True)
+        self.monitor_thread.start()
+        self.add_message(f"Live monitor: watching {path}")
+
+    def on_table_edited(self, waiter, holder, waits):
+        # The input changed under any detection in flight; its result would be stale
+        if self.detect_button.isEnabled():
+            self.runner.cancel()
+            self.fix_button.setEnabled(True)
+            self.progress_bar.setVisible(False)
+        self.refresh_history()
+
+    def active_manager(self):
+        return self.graph_manager if self.loaded_graph else self.table_manager
+
+    def refresh_history(self):
+        # Extend the slider to the latest version and put the table back on the live graph
+        manager = self.active_manager()
+        history = manager.history
+        if self.table_model.manager is self.history_view:
+            self.table_model.set_manager(manager)
+        self.history_slider.blockSignals(True)
+        self.history_slider.setRange(history.oldest, history.version)
+        self.history_slider.setValue(history.version)
+        self.history_slider.blockSignals(False)
+        graph = manager.get_graph()
+        # Rebuilding a big graph takes a while; then only the released position is shown
+        self.history_slider.setTracking(graph.number_of_nodes() + graph.number_of_edges() <= HISTORY_LIVE_LIMIT)
+        self.history_label.setText("Now")
+
+    def scrub_history(self, version):
+        manager = self.active_manager()
+        history = manager.history
+        if version >= history.version:
+            self.table_model.set_manager(manager)
+            self.history_label.setText("Now")
+            return
+        graph = history.graph_at(version)
+        self.history_view.graph = graph
+        self.history_view.processes = list(graph)
+        self.table_model.set_manager(self.history_view, editable=False)
+        stamp = time.strftime("%H:%M:%S", time.localtime(history.time_of(version)))
+        self.history_label.setText(f"v{version} at {stamp}")
+
     def detect_deadlock(self):
-        self.deadlock_graph = self.get_table_data()
+        if self.table_model.manager is self.history_view:
+            self.refresh_history()  # detection always runs on the live graph
+        # Workers get a copy: the table keeps editing the live graph while they run
+        if self.loaded_graph:
+            self.deadlock_graph = self.graph_manager.get_graph().copy()
+            self.deadlock_key = self.graph_manager.fingerprint()
+        else:
+            self.deadlock_graph = self.get_table_data()
+            self.deadlock_key = self.table_manager.fingerprint()
        
         if len(self.deadlock_graph.nodes) == 0:
             self.add_message("No valid process dependencies found.")
             return
+
+        rag = self.graph_manager.rag if self.loaded_graph else None
+        # Detection runs on a worker thread; a newer click cancels the one in flight
+        self.fix_button.setEnabled(False)
+        task = profile_analysis if self.profile_button.isChecked() else analyze_graph
+        self.profile_button.setChecked(False)
+        self.runner.submit(
+            task, self.cache, self.deadlock_graph, self.deadlock_key, rag, self.chart_inputs(),
+            on_finished=self.on_detection_finished, on_progress=self.on_task_progress,
+            on_failed=self.on_task_failed, on_cancelled=self.on_task_cancelled,
+        )
+
+    def on_task_progress(self, percent, stage):
+        self.progress_bar.setVisible(percent < 100)
+        self.progress_bar.setValue(percent)
+        self.progress_bar.setFormat(f"{stage}... %p%")
+
+    def on_task_failed(self, error):
+        self.progress_bar.setVisible(False)
+        self.detect_button.setEnabled(True)
+        self.fix_button.setEnabled(True)
+        # error is a short traceback; its last line names the exception
+        self.add_message(f"Task failed: {error.strip().splitlines()[-1]}")
+
+    def on_task_cancelled(self):
+        if not self.runner.busy():
+            self.progress_bar.setVisible(False)
+            self.detect_button.setEnabled(True)
+            self.fix_button.setEnabled(True)
+
+    def on_detection_finished(self, result):
+        self.progress_bar.setVisible(False)
+        self.fix_button.setEnabled(True)
+        stats = self.cache.stats
+        self.detect_button.setToolTip(
+            f"Result cache: {stats.hits} hits of {stats.hits + stats.misses} lookups ({stats.hit_rate:.0%})"
+        )
+        if "profile" in result:
+            self.save_profile(result["profile"])
+        stuck = result["stuck"]
+        if stuck is not None:
+            # With multi-instance resources a wait-for cycle is not enough; this is the work/finish verdict
+            self.add_message(
+                f"Resource check (multi-instance): {len(stuck)} deadlocked process{'es' if len(stuck) != 1 else ''}"
+                f"{': ' + ', '.join(stuck[:20]) if stuck else '.'}{' ...' if len(stuck) > 20 else ''}"
+            )
        
-        deadlock_type = self.identify_deadlock_type()
+        deadlock_type = result["deadlock_type"]
        
         if "No Deadlock" in deadlock_type:
             self.add_message("✅ No Deadlock Detected.")
         else:
-            # Check for a cycle if the deadlock type is Circular Wait
-            cycle = list(nx.find_cycle(self.deadlock_graph, orientation='original')) if "Circular Wait" in deadlock_type else []
-            # Each element in cycle is a tuple (u, v, direction), so we only need u and v
-            cycle_str = " -> ".join([f"{u} to {v}" for u, v, _ in cycle]) if cycle else "N/A"
-            processes_involved = [p[0] for p in cycle] if cycle else list(self.deadlock_graph.nodes)
+            # Every deadlocked component (cyclic SCC or self-loop), each with one representative cycle
+            components = result["components"]
+            cycle_str = " | ".join(
+                " -> ".join(f"{u} to {v}" for u, v in component.cycle) for component in components
+            ) if components else "N/A"
+            processes_involved = (
+                [p for component in components for p in component.processes]
+                if components else list(self.deadlock_graph.nodes)
+            )
            
             # Detailed explanation
             explanation = f"⚠️ Deadlock Detected! Type: {deadlock_type}\n"
@@ -384,53 +894,13 @@ class DeadlockDetectionAI(QMainWindow):
             self.highlight_deadlock(processes_involved)
        
         # Update the chart with the new graph state
-        self.update_chart()
+        self.update_chart(result["series"])
 
     def identify_deadlock_type(self):
-        if not self.deadlock_graph or not self.deadlock_graph.edges:
-            return "No Deadlock"
-
-        edges = list(self.deadlock_graph.edges)
-        processes = list(self.deadlock_graph.nodes)
-        edges_set = set(edges)
-
-        # Check for self-loops (Mutual Exclusion Deadlock)
-        has_self_loop = any(u == v for u, v in edges)
-        if has_self_loop:
-            return "🔴 Mutual Exclusion Deadlock (Self-loop detected)."
-
-        # Check for bidirectional edges (No Preemption Deadlock)
-        has_bidirectional = any((v, u) in edges_set for u, v in edges)
-        if has_bidirectional:
-            # Ensure this isn't part of a larger cycle
-            try:
-                nx.find_cycle(self.deadlock_graph, orientation="original")
-                return "🟠 Circular Wait Deadlock (Processes waiting in a cycle)."
-            except nx.NetworkXNoCycle:
-                return "🟡 No Preemption Deadlock (Irreversible resource holding)."
-
-        # Check for cycles (Circular Wait Deadlock)
-        try:
-            nx.find_cycle(self.deadlock_graph, orientation="original")
-            return "🟠 Circular Wait Deadlock (Processes waiting in a cycle)."
-        except nx.NetworkXNoCycle:
-            pass
-
-        # Check for Hold and Wait (a process holds a resource and waits for another, without a cycle)
-        hold_wait_detected = False
-        for u in processes:
-            outgoing = set(v for _, v in self.deadlock_graph.out_edges(u))
-            incoming = set(v for v, _ in self.deadlock_graph.in_edges(u))
-            # A process must be holding a resource (outgoing edge) and waiting for another (incoming edge)
-            # Additionally, ensure this isn't part of a cycle (already checked above)
-            if outgoing and incoming and u not in outgoing:  # Exclude self-loops (already checked)
-                hold_wait_detected = True
-                break
-        if hold_wait_detected:
-            return "🔵 Hold and Wait Deadlock (Processes holding resources and waiting)."
-
-        return "No Deadlock"
+        # Single-pass classification; see DeadlockDetector.classify
+        return DEADLOCK_LABELS[self.detector.detect(self.deadlock_graph)]
 
+    @timed("highlight")
     def highlight_deadlock(self, deadlocked_processes):
         # Create a gradient for the red highlight
         gradient = QLinearGradient(0, 0, 100, 100)  # Gradient direction
@@ -438,37 +908,68 @@ class DeadlockDetectionAI(QMainWindow):
         gradient.setColorAt(1, QColor("#FF6347"))  # Light red
         brush = QBrush(gradient)
 
-        for process in deadlocked_processes:
-            idx = int(process[1:]) - 1  
-            for col in range(self.table.columnCount()):
-                item = self.table.item(idx, col) or QTableWidgetItem("")
-                item.setBackground(brush)  # Apply the gradient brush
-                self.table.setItem(idx, col, item)
+        self.table_model.mark_rows(deadlocked_processes, brush)
    
     def fix_deadlock(self):
         if not self.deadlock_graph:
             self.add_message("No deadlock detected to fix.")
             return
        
-        try:
-            cycle = nx.find_cycle(self.deadlock_graph, orientation='original')
-            process_to_remove = cycle[0][0]  # Remove the first process in the cycle
-            self.deadlock_graph.remove_node(process_to_remove)
-            self.update_table()
-            self.add_message(f"✅ Deadlock Resolved! Process {process_to_remove} preempted.")
-            self.highlight_fix()
-            self.update_chart()
-        except nx.NetworkXNoCycle:
+        # The loaded graph may have been edited since detection, and an earlier Fix changed the
+        # table copy, so the key is always taken from the graph about to be resolved
+        if self.loaded_graph:
+            self.deadlock_graph = self.graph_manager.get_graph().copy()
+            self.deadlock_key = self.graph_manager.fingerprint()
+        else:
+            self.deadlock_key = GraphFingerprint.of_graph(self.deadlock_graph).key
+        # Preempt the cheapest set of processes that breaks every deadlock in one call, off the GUI thread
+        self.detect_button.setEnabled(False)
+        self.fix_button.setEnabled(False)
+        self.runner.submit(
+            resolve_graph, self.cache, self.deadlock_graph, self.deadlock_key, self.chart_inputs(),
+            on_finished=self.on_fix_finished, on_progress=self.on_task_progress,
+            on_failed=self.on_task_failed, on_cancelled=self.on_task_cancelled,
+        )
+
+    def on_fix_finished(self, result):
+        self.progress_bar.setVisible(False)
+        self.detect_button.setEnabled(True)
+        self.fix_button.setEnabled(True)
+        resolution = result["resolution"]
+        removed = resolution.victims
+        if not removed:
             self.add_message("No deadlock to fix.")
+            return
+        self.update_table(removed)
+        self.add_message(
+            f"✅ Deadlock Resolved! Process{'es' if len(removed) > 1 else ''} {', '.join(removed)} preempted "
+            f"({resolution.passes_saved} detection pass{'es' if resolution.passes_saved != 1 else ''} saved)."
+        )
+        self.highlight_fix()
+        self.update_chart(result["series"])
    
-    def update_table(self):
-        processes = ["P1", "P2", "P3", "P4", "P5"]
-       
-        for i in range(5):
-            for j in range(5):
-                item = self.table.item(i, j)
-                if item:
-                    item.setText("1" if (processes[i], processes[j]) in self.deadlock_graph.edges else "0")
+    def update_table(self, removed):
+        # Preempted processes keep their rows, now without any edges
+        self.deadlock_graph.add_nodes_from(removed)
+        if self.loaded_graph:
+            # The worker resolved a copy; drop the victims' waits from the live graph here, on the GUI thread
+            graph = self.graph_manager.get_graph()
+            for process in removed:
+                if process in graph:
+                    for waiter in list(graph.predecessors(process)):
+                        self.graph_manager.set_edge(waiter, process, False)
+                    for holder in list(graph.successors(process)):
+                        self.graph_manager.set_edge(process, holder, False)
+            if self.graph_manager.rag is not None:
+                self.graph_manager.rag.release(removed)  # or the next Detect checks their old allocations
+        else:
+            processes = self.table_processes()
+            index = {p: i for i, p in enumerate(processes)}
+            self.table_manager.build_from_edges(
+                processes, ((index[u], index[v]) for u, v in self.deadlock_graph.edges if u in index and v in index)
+            )
+        self.table_model.refresh()
+        self.refresh_history()
    
     def highlight_fix(self):
         # Create a gradient for the green highlight
@@ -477,20 +978,11 @@ class DeadlockDetectionAI(QMainWindow):
         gradient.setColorAt(1, QColor("#90EE90"))  # Light green
         brush = QBrush(gradient)
 
-        for row in range(self.table.rowCount()):
-            for col in range(self.table.columnCount()):
-                item = self.table.item(row, col)
-                if item:
-                    item.setBackground(brush)  # Apply the gradient brush
-                    self.table.setItem(row, col, item)
+        self.table_model.fill(brush)  # Apply the gradient brush
         QTimer.singleShot(15000, self.reset_table)  
 
     def reset_table(self):
-        for row in range(self.table.rowCount()):
-            for col in range(self.table.columnCount()):
-                item = self.table.item(row, col)
-                if item:
-                    item.setBackground(QColor("#FFFFFF"))  # Reset to white
+        self.table_model.clear_marks()  # Reset to white
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
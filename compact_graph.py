@@ -0,0 +1,303 @@
+"""Array-backed wait-for graph for snapshots too large for networkx.
+
+Processes are dense integer ids into an interned name table; out-edges are
+CSR buffers (indptr, indices) and in-edges the matching CSC buffers, built
+on first use. An edge costs 4 bytes per direction instead of the few hundred
+a DiGraph spends on nested dicts. Removing a process only clears its alive
+flag, so the buffers stay shared and read-only (they may be memory-mapped).
+
+DeadlockDetector runs on it unchanged: _succ is a read-only, name-keyed view
+of the CSR buffers with the same shape as DiGraph._succ.
+
+open() maps a snapshot file (see graph_loader.write_snapshot) without
+reading it; the name table and the name -> id index are built on first use.
+"""
+from typing import Iterable, Iterator, Optional, Sequence
+import networkx as nx
+import numpy as np
+from core.graph_loader import decode_names, map_snapshot, write_snapshot
+
+class CompactGraph:
+    __slots__ = ("_names", "_name_blob", "_index", "size", "indptr", "indices", "alive", "removed",
+                 "_targets", "_in_indptr", "_in_sources", "_edge_count")
+
+    def __init__(self, names: Sequence[str], indptr, indices):
+        self._names = list(names)
+        self._name_blob = None
+        self._index = None
+        if len(self.index) != len(self._names):
+            raise ValueError("process names must be unique")
+        self._set_buffers(indptr, indices)
+
+    def _set_buffers(self, indptr, indices) -> None:
+        self.indptr = np.ascontiguousarray(indptr)
+        self.indices = np.ascontiguousarray(indices)
+        self.size = len(self.indptr) - 1
+        if self.size < 0 or (self._names is not None and self.size != len(self._names)):
+            raise ValueError("indptr must have len(names) + 1 entries")
+        if self.indices.shape != (int(self.indptr[-1]),):
+            raise ValueError("indices must have indptr[-1] entries")
+        self.alive = bytearray(b"\x01") * self.size
+        self.removed = 0
+        # iterating a memoryview yields plain ints, far faster than numpy scalars
+        self._targets = memoryview(self.indices)
+        self._in_indptr = None
+        self._in_sources = None
+        self._edge_count = int(self.indptr[-1])
+
+    @classmethod
+    def open(cls, path: str) -> "CompactGraph":
+        """Map a snapshot file read-only; the buffers are used in place, never copied"""
+        blob, indptr, indices = map_snapshot(path)
+        graph = object.__new__(cls)
+        graph._names = None
+        graph._name_blob = blob
+        graph._index = None
+        graph._set_buffers(indptr, indices)
+        return graph
+
+    def save(self, path: str) -> None:
+        """Write the graph as a snapshot; removed processes and their edges are dropped"""
+        if not self.removed:
+            write_snapshot(path, self.names, self.indptr, self.indices)
+            return
+        alive = np.frombuffer(self.alive, dtype=np.uint8).astype(bool)
+        src = np.repeat(np.arange(self.size), np.diff(self.indptr))
+        keep = alive[src] & alive[self.indices]
+        ids = np.cumsum(alive) - 1
+        live = CompactGraph.from_edges(list(self), ids[src[keep]], ids[self.indices[keep]])
+        write_snapshot(path, live.names, live.indptr, live.indices)
+
+    @property
+    def names(self) -> list[str]:
+        if self._names is None:
+            self._names = decode_names(self._name_blob, self.size)
+            self._name_blob = None
+        return self._names
+
+    @property
+    def index(self) -> dict[str, int]:
+        if self._index is None:
+            names = self.names
+            self._index = {name: i for i, name in enumerate(names)}
+            if len(self._index) != len(names):
+                raise ValueError("process names must be unique")
+        return self._index
+
+    @classmethod
+    def from_edges(cls, names: Sequence[str], src, dst) -> "CompactGraph":
+        """Build from parallel arrays of waiter and holder ids; duplicate edges collapse"""
+        n = len(names)
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        if src.shape != dst.shape:
+            raise ValueError("src and dst must have the same length")
+        if src.size and (min(src.min(), dst.min()) < 0 or max(src.max(), dst.max()) >= n):
+            raise ValueError("edge endpoint out of range")
+        # sorting the combined key orders edges by waiter, then holder, and drops repeats
+        keys = np.unique(src * n + dst) if n else src
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // n if n else keys, minlength=n), out=indptr[1:])
+        return cls(names, indptr, (keys % n if n else keys).astype(np.uint32))
+
+    @classmethod
+    def from_networkx(cls, graph: nx.DiGraph) -> "CompactGraph":
+        names = list(graph.nodes)
+        ids = {name: i for i, name in enumerate(names)}
+        m = graph.number_of_edges()
+        src = np.fromiter((ids[u] for u, _ in graph.edges), dtype=np.int64, count=m)
+        dst = np.fromiter((ids[v] for _, v in graph.edges), dtype=np.int64, count=m)
+        return cls.from_edges(names, src, dst)
+
+    def to_networkx(self) -> nx.DiGraph:
+        graph = nx.DiGraph()
+        graph.add_nodes_from(self)
+        graph.add_edges_from(self.edges)
+        return graph
+
+    def copy(self) -> "CompactGraph":
+        """Shares the buffers; only the alive flags are copied"""
+        other = object.__new__(CompactGraph)
+        for slot in CompactGraph.__slots__:
+            setattr(other, slot, getattr(self, slot))
+        other.alive = bytearray(self.alive)
+        return other
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in adjacency buffers and alive flags; the name table is extra"""
+        total = self.indptr.nbytes + self.indices.nbytes + len(self.alive)
+        if self._in_indptr is not None:
+            total += self._in_indptr.nbytes + self._in_sources.nbytes
+        return total
+
+    # --- the DiGraph subset DeadlockDetector and its callers use ---
+
+    def __len__(self) -> int:
+        return self.size - self.removed
+
+    def __iter__(self) -> Iterator[str]:
+        if not self.removed:
+            return iter(self.names)
+        alive = self.alive
+        return (name for i, name in enumerate(self.names) if alive[i])
+
+    def __contains__(self, name) -> bool:
+        i = self.index.get(name)
+        return i is not None and bool(self.alive[i])
+
+    @property
+    def nodes(self) -> list[str]:
+        return list(self)
+
+    @property
+    def edges(self) -> "_EdgeView":
+        return _EdgeView(self)
+
+    @property
+    def _succ(self) -> "_Adjacency":
+        return _Adjacency(self, self.indptr, self._targets)
+
+    @property
+    def _pred(self) -> "_Adjacency":
+        self._build_csc()
+        return _Adjacency(self, self._in_indptr, memoryview(self._in_sources))
+
+    def number_of_nodes(self) -> int:
+        return len(self)
+
+    def number_of_edges(self) -> int:
+        if self._edge_count is None:
+            alive = np.frombuffer(self.alive, dtype=np.uint8).astype(bool)
+            from_alive = np.repeat(alive, np.diff(self.indptr))
+            self._edge_count = int(np.count_nonzero(from_alive & alive[self.indices]))
+        return self._edge_count
+
+    def has_edge(self, u, v) -> bool:
+        try:
+            return v in self._succ[u]
+        except KeyError:
+            return False
+
+    def successors(self, name) -> Iterator[str]:
+        return iter(self._succ[name])
+
+    def predecessors(self, name) -> Iterator[str]:
+        return iter(self._pred[name])
+
+    def remove_node(self, name) -> None:
+        if name not in self:
+            raise nx.NetworkXError(f"The node {name} is not in the graph.")
+        self.alive[self.index[name]] = 0
+        self.removed += 1
+        self._edge_count = None
+
+    def remove_nodes_from(self, names: Iterable[str]) -> None:
+        for name in names:
+            if name in self:
+                self.remove_node(name)
+
+    def find_cycle(self) -> Optional[list[tuple[str, str]]]:
+        """One cycle as (waiter, holder) edges, or None when the graph is acyclic"""
+        indptr, targets, alive, names = self.indptr.tolist(), self._targets, self.alive, self.names
+        state = bytearray(self.size)  # 1 = on the DFS stack, 2 = finished
+        for root in range(self.size):
+            if state[root] or not alive[root]:
+                continue
+            state[root] = 1
+            path = [root]
+            stack = [iter(targets[indptr[root]:indptr[root + 1]])]
+            while stack:
+                for v in stack[-1]:
+                    if not alive[v] or state[v] == 2:
+                        continue
+                    if state[v] == 1:
+                        loop = path[path.index(v):]
+                        return [(names[a], names[b]) for a, b in zip(loop, loop[1:] + loop[:1])]
+                    state[v] = 1
+                    path.append(v)
+                    stack.append(iter(targets[indptr[v]:indptr[v + 1]]))
+                    break
+                else:
+                    state[path.pop()] = 2
+                    stack.pop()
+        return None
+
+    def _build_csc(self) -> None:
+        if self._in_indptr is not None:
+            return
+        n = self.size
+        order = np.argsort(self.indices, kind="stable")
+        sources = np.repeat(np.arange(n, dtype=np.uint32), np.diff(self.indptr))
+        self._in_sources = np.ascontiguousarray(sources[order])
+        self._in_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=n), out=self._in_indptr[1:])
+
+class _Adjacency:
+    """Name-keyed mapping of process -> neighbours over one direction's buffers"""
+    __slots__ = ("graph", "indptr", "targets")
+
+    def __init__(self, graph: CompactGraph, indptr: np.ndarray, targets: memoryview):
+        self.graph = graph
+        self.indptr = indptr
+        self.targets = targets
+
+    def __getitem__(self, name) -> "_Neighbors":
+        i = self.graph.index[name]
+        if not self.graph.alive[i]:
+            raise KeyError(name)
+        return _Neighbors(self.graph, self.targets[int(self.indptr[i]):int(self.indptr[i + 1])])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.graph)
+
+    def __len__(self) -> int:
+        return len(self.graph)
+
+    def __contains__(self, name) -> bool:
+        return name in self.graph
+
+class _Neighbors:
+    __slots__ = ("graph", "ids")
+
+    def __init__(self, graph: CompactGraph, ids: memoryview):
+        self.graph = graph
+        self.ids = ids
+
+    def __iter__(self) -> Iterator[str]:
+        names = self.graph.names
+        if not self.graph.removed:
+            return map(names.__getitem__, self.ids)
+        alive = self.graph.alive
+        return (names[v] for v in self.ids if alive[v])
+
+    def __contains__(self, name) -> bool:
+        v = self.graph.index.get(name)
+        return v is not None and bool(self.graph.alive[v]) and v in self.ids
+
+    def __len__(self) -> int:
+        if not self.graph.removed:
+            return len(self.ids)
+        alive = self.graph.alive
+        return sum(1 for v in self.ids if alive[v])
+
+    def __bool__(self) -> bool:
+        if not self.graph.removed:
+            return len(self.ids) > 0
+        alive = self.graph.alive
+        return any(alive[v] for v in self.ids)
+
+class _EdgeView:
+    __slots__ = ("graph",)
+
+    def __init__(self, graph: CompactGraph):
+        self.graph = graph
+
+    def __iter__(self) -> Iterator[tuple[str, str]]:
+        succ = self.graph._succ
+        for u in self.graph:
+            for v in succ[u]:
+                yield u, v
+
+    def __len__(self) -> int:
+        return self.graph.number_of_edges()
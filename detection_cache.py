@@ -0,0 +1,134 @@
+"""Memoized detection keyed by an order-independent fingerprint of the edge set.
+
+    cache = DetectionCache()
+    cache.detect(graph, manager.fingerprint())   # O(1) once this edge set was seen
+
+Without a key the fingerprint is computed from the graph, which is one
+O(E) hashing pass; callers that keep a GraphFingerprint up to date as edges
+change (GraphManager does) get true O(1) lookups.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Iterable, Optional
+import networkx as nx
+from core.detector import DeadlockDetector
+from core.types import DeadlockComponent, DeadlockType, Resolution
+
+_MISS = object()
+
+class GraphFingerprint:
+    """XOR of per-edge hashes plus the edge count, updated in O(1) per edge.
+
+    Equal edge sets give equal keys whatever order the edges arrived in.
+    Isolated processes do not count: no detection result depends on them.
+    """
+    __slots__ = ("value", "edges")
+
+    def __init__(self, edges: Iterable[tuple] = ()):
+        self.value = 0
+        self.edges = 0
+        for u, v in edges:
+            self.add(u, v)
+
+    @classmethod
+    def of_graph(cls, graph: nx.DiGraph) -> "GraphFingerprint":
+        return cls(graph.edges)
+
+    def add(self, u, v) -> None:
+        self.value ^= hash((u, v))
+        self.edges += 1
+
+    def remove(self, u, v) -> None:
+        self.value ^= hash((u, v))
+        self.edges -= 1
+
+    @property
+    def key(self) -> tuple[int, int]:
+        return self.value, self.edges
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+class DetectionCache:
+    """Bounded LRU in front of a DeadlockDetector's detect, find_deadlocks and resolvers.
+
+    The resolvers still remove their victims from the graph on a hit, so the
+    caller sees the same side effect as an uncached call.
+    """
+
+    def __init__(self, detector: DeadlockDetector = None, size: int = 256):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.detector = detector or DeadlockDetector()
+        self.size = size
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()  # detection runs on worker threads
+
+    def detect(self, graph: nx.DiGraph, key: Hashable = None) -> DeadlockType:
+        entry = self._key("detect", graph, key)
+        result = self._get(entry)
+        if result is _MISS:
+            result = self._put(entry, self.detector.detect(graph))
+        return result
+
+    def find_deadlocks(self, graph: nx.DiGraph, key: Hashable = None) -> list[DeadlockComponent]:
+        entry = self._key("find_deadlocks", graph, key)
+        result = self._get(entry)
+        if result is _MISS:
+            result = self._put(entry, tuple(self.detector.find_deadlocks(graph)))
+        return list(result)
+
+    def resolve(self, graph: nx.DiGraph, key: Hashable = None) -> Optional[str]:
+        entry = self._key("resolve", graph, key)
+        victim = self._get(entry)
+        if victim is _MISS:
+            return self._put(entry, self.detector.resolve(graph))
+        if victim is not None:
+            graph.remove_node(victim)
+        return victim
+
+    def resolve_min_cost(self, graph: nx.DiGraph, key: Hashable = None) -> Resolution:
+        """Cached for default costs only; pass costs to the detector directly otherwise"""
+        entry = self._key("resolve_min_cost", graph, key)
+        resolution = self._get(entry)
+        if resolution is _MISS:
+            return self._put(entry, self.detector.resolve_min_cost(graph))
+        graph.remove_nodes_from(resolution.victims)
+        return resolution
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _key(op: str, graph: nx.DiGraph, key: Hashable) -> tuple:
+        # taken before the call, since the resolvers change the graph
+        return op, GraphFingerprint.of_graph(graph).key if key is None else key
+
+    def _get(self, entry: tuple):
+        with self._lock:
+            if entry not in self._entries:
+                self.stats.misses += 1
+                return _MISS
+            self._entries.move_to_end(entry)
+            self.stats.hits += 1
+            return self._entries[entry]
+
+    def _put(self, entry: tuple, value):
+        with self._lock:
+            self._entries[entry] = value
+            self._entries.move_to_end(entry)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+        return value
@@ -0,0 +1,411 @@
+"""Partitioned deadlock detection: each partition summarizes its part of the wait-for graph and a
+coordinator finds the global deadlocks from the summaries.
+
+    python -m core.distributed serve 127.0.0.1:7001 host1_edges.csv    # on each host
+    python -m core.distributed detect 127.0.0.1:7001 127.0.0.1:7002   # anywhere
+    python -m core.distributed local --partitions 4 big.csv            # local processes over pipes
+
+A partition owns the waiters of its edges, so every host can describe its
+part from what it sees locally. An edge to a process owned elsewhere is an
+exit; an owned process that another partition waits on is an entry. The
+coordinator never sees a partition's inner graph, only:
+
+1. its exit targets,
+2. the condensation of the part of its graph that lies on a path from an
+   entry to an exit (int32 arrays: one node per local SCC), plus its local
+   deadlocks,
+3. for each global deadlock it takes part in, the member processes and
+   the local stretch of one representative cycle.
+
+A deadlock spanning partitions is a cycle in the union of the step-2
+condensations, joined where one partition's exit target is another's
+entry. Messages are pickles, so serving or connecting beyond the loopback
+interface requires an authkey; without one only 127.0.0.1, ::1 and
+localhost are accepted.
+"""
+import argparse
+import ipaddress
+import json
+import os
+import pickle
+import sys
+import time
+from dataclasses import dataclass
+from multiprocessing import AuthenticationError, Pipe, Process
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Iterable, Sequence
+import networkx as nx
+import numpy as np
+from core.detector import DeadlockDetector
+from core.types import DeadlockComponent
+
+@dataclass
+class PartitionStats:
+    partitions: int = 0
+    messages: int = 0
+    bytes_sent: int = 0  # both directions, as pickled on the wire
+    summary_links: int = 0  # condensation links the coordinator received
+    seconds: float = 0.0
+
+class Partition:
+    """One partition's edges and the answers it gives the coordinator"""
+
+    def __init__(self, edges: Iterable[tuple[str, str]], processes: Iterable[str] = ()):
+        edges = list(edges)
+        self.owned = set(processes)
+        self.owned.update(waiter for waiter, _ in edges)
+        self.graph = nx.DiGraph()
+        self.graph.add_nodes_from(self.owned)
+        self.exits = {}  # owned waiter -> holders owned elsewhere
+        self.exit_sources = {}  # holder owned elsewhere -> owned waiters
+        for waiter, holder in edges:
+            if holder in self.owned:
+                self.graph.add_edge(waiter, holder)
+            else:
+                self.exits.setdefault(waiter, set()).add(holder)
+                self.exit_sources.setdefault(holder, set()).add(waiter)
+        self.detector = DeadlockDetector()
+        self.deadlocks = []  # local deadlocks found by the last summarize
+
+    @classmethod
+    def from_graph(cls, graph: nx.DiGraph) -> "Partition":
+        """A host's local graph; it owns only the processes it has wait edges for, since its other
+        nodes may be holders on other hosts"""
+        return cls(graph.edges)
+
+    def handle(self, command: str, payload):
+        if command == "exits":
+            return sorted(self.exit_sources)
+        if command == "summarize":
+            return self.summarize(payload)
+        if command == "expand":
+            return self.expand(*payload)
+        raise ValueError(f"Unknown command {command!r}")
+
+    def summarize(self, wanted: Sequence[str]) -> tuple[list, list, bytes, bytes, list]:
+        """The condensation of the part of the local graph between entries and exits.
+
+        Returns (entries, exit targets, then as int32 bytes: the SCC id of
+        each entry, the links, and the SCC id of each local deadlock). SCC
+        ids are dense from 0; a link (a, b) runs from SCC a to SCC b, or to
+        exit target b - count when b >= count, where count is the number of
+        SCCs kept. Entries and deadlocks outside the kept part get id -1.
+        The deadlocks themselves are only sent by expand, for those that do
+        not turn out to be part of a larger one.
+        """
+        entries = [p for p in wanted if p in self.owned]
+        targets = sorted(self.exit_sources)
+        target_id = {t: j for j, t in enumerate(targets)}
+        succ = self.graph._succ
+        sccs = self.detector.strongly_connected_components(self.graph)
+        relevant = self._reach(entries, succ)
+        # Tarjan finishes an SCC after every SCC it reaches, so a single pass
+        # in its order can keep just the SCCs that lead on to an exit
+        component_of, kept, links = {}, {}, set()
+        for c, members in enumerate(sccs):
+            for u in members:
+                component_of[u] = c
+            if members[0] not in relevant:
+                continue
+            # c itself is not in kept yet, so links inside the SCC drop out
+            out = {kept[component_of[v]] for u in members for v in succ[u] if component_of[v] in kept}
+            exits = {target_id[t] for u in members for t in self.exits.get(u, ())}
+            if out or exits:
+                kept[c] = a = len(kept)
+                links.update((a, b) for b in out)
+                links.update((a, -1 - j) for j in exits)  # renumbered once the count is known
+        count = len(kept)
+        links = [(a, b if b >= 0 else count - 1 - b) for a, b in links]
+        entry_scc = [kept.get(component_of[entry], -1) for entry in entries]
+        self.deadlocks = self.detector.deadlocked_components(self.graph, sccs)
+        deadlock_scc = [kept.get(component_of[c.processes[0]], -1) for c in self.deadlocks]
+        return (entries, targets, np.array(entry_scc, dtype=np.int32).tobytes(),
+                np.array(links, dtype=np.int32).tobytes(), np.array(deadlock_scc, dtype=np.int32).tobytes())
+
+    def expand(self, requests: list, deadlocks: Sequence[int]) -> tuple[list, list]:
+        """For each (key, entries, targets, hops): the owned processes on a path from those entries
+        to an exit into those targets, and for each (entry, target) hop a local path leading to it.
+        Also the local deadlocks at the given positions of the last summarize, as (processes, cycle)."""
+        replies = []
+        for key, entries, targets, hops in requests:
+            forward = self._reach(entries, self.graph._succ)
+            sources = {u for t in targets for u in self.exit_sources.get(t, ())}
+            backward = self._reach(sources, self.graph._pred)
+            paths = {(entry, target): self._path(entry, self.exit_sources.get(target, set()))
+                     for entry, target in hops}
+            replies.append((key, sorted(forward & backward), paths))
+        return replies, [(self.deadlocks[i].processes, self.deadlocks[i].cycle) for i in deadlocks]
+
+    @staticmethod
+    def _reach(starts, adjacency) -> set:
+        seen = set(starts)
+        stack = list(seen)
+        while stack:
+            for v in adjacency[stack.pop()]:
+                if v not in seen:
+                    seen.add(v)
+                    stack.append(v)
+        return seen
+
+    def _path(self, start: str, goals: set) -> list:
+        """Breadth-first path from start to the nearest of goals, both ends included"""
+        parent = {start: None}
+        frontier = [start]
+        while frontier:
+            next_frontier = []
+            for u in frontier:
+                if u in goals:
+                    path = []
+                    while u is not None:
+                        path.append(u)
+                        u = parent[u]
+                    return path[::-1]
+                for v in self.graph._succ[u]:
+                    if v not in parent:
+                        parent[v] = u
+                        next_frontier.append(v)
+            frontier = next_frontier
+        raise ValueError(f"no local path from {start!r} to an exit")
+
+def serve(conn: Connection, partition: Partition) -> None:
+    """Answer the coordinator's requests until it closes the connection"""
+    while True:
+        try:
+            command, payload = pickle.loads(conn.recv_bytes())
+        except EOFError:
+            return
+        if command == "close":
+            return
+        try:
+            reply = ("ok", partition.handle(command, payload))
+        except ValueError as e:
+            reply = ("error", str(e))
+        conn.send_bytes(pickle.dumps(reply, pickle.HIGHEST_PROTOCOL))
+
+def _serve_partition(conn: Connection, processes: list, edges: list) -> None:
+    serve(conn, Partition(edges, processes))
+
+def _require_authkey(address: tuple[str, int], authkey: bytes) -> None:
+    # unpickling what an unauthenticated peer sends would run its code
+    if authkey:
+        return
+    host = address[0]
+    try:
+        loopback = host == "localhost" or ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        loopback = False
+    if not loopback:
+        raise ValueError(f"{host}:{address[1]} is not a loopback address; an authkey is required")
+
+def serve_address(address: tuple[str, int], partition: Partition, authkey: bytes = None) -> None:
+    """Listen on address and serve one coordinator connection at a time"""
+    _require_authkey(address, authkey)
+    with Listener(address, authkey=authkey) as listener:
+        while True:
+            try:
+                with listener.accept() as conn:
+                    serve(conn, partition)
+            except (AuthenticationError, OSError) as e:
+                # one bad or dropped client must not take the partition down
+                print(f"{address[0]}:{address[1]}: {e}", file=sys.stderr)
+
+def _simple_cycle(walk: list) -> tuple:
+    """The first simple cycle of a closed walk given as edges; stretches joined across partitions can revisit a process"""
+    nodes = [u for u, _ in walk]
+    seen = {}
+    for i, u in enumerate(nodes):
+        if u in seen:
+            nodes = nodes[seen[u]:i]
+            break
+        seen[u] = i
+    return tuple(zip(nodes, nodes[1:] + nodes[:1]))
+
+def split_graph(graph: nx.DiGraph, parts: int) -> list[tuple[list, list]]:
+    """(processes, edges) for parts partitions: contiguous runs of the graph's node order, each process
+    with its wait edges, so processes listed together (one host's, say) stay together"""
+    if parts < 1:
+        raise ValueError("parts must be positive")
+    n = graph.number_of_nodes()
+    split = [([], []) for _ in range(parts)]
+    owner = {}
+    for i, p in enumerate(graph):
+        owner[p] = i * parts // n
+        split[owner[p]][0].append(p)
+    for waiter, holder in graph.edges:
+        split[owner[waiter]][1].append((waiter, holder))
+    return split
+
+class PartitionedDetector:
+    """Coordinator: finds the deadlocks of the union of its partitions' graphs.
+
+    Every request goes to all partitions before any reply is read, so they
+    work in parallel.
+    """
+
+    def __init__(self, connections: Sequence[Connection], workers: Sequence[Process] = ()):
+        self.connections = list(connections)
+        self.workers = list(workers)
+        self.stats = PartitionStats(partitions=len(self.connections))
+
+    @classmethod
+    def spawn(cls, parts: Iterable[tuple[Iterable[str], Iterable[tuple[str, str]]]]) -> "PartitionedDetector":
+        """One local process per (processes, edges) part, each talking to the coordinator over a pipe"""
+        connections, workers = [], []
+        for processes, edges in parts:
+            ours, theirs = Pipe()
+            worker = Process(target=_serve_partition, args=(theirs, list(processes), list(edges)), daemon=True)
+            worker.start()
+            theirs.close()
+            connections.append(ours)
+            workers.append(worker)
+        return cls(connections, workers)
+
+    @classmethod
+    def connect(cls, addresses: Iterable[tuple[str, int]], authkey: bytes = None) -> "PartitionedDetector":
+        """Partitions already serving on these (host, port) addresses (see serve_address)"""
+        addresses = list(addresses)
+        for address in addresses:
+            _require_authkey(address, authkey)
+        return cls([Client(address, authkey=authkey) for address in addresses])
+
+    def close(self) -> None:
+        for conn in self.connections:
+            try:
+                conn.send_bytes(pickle.dumps(("close", None)))
+            except OSError:
+                pass
+            conn.close()
+        for worker in self.workers:
+            worker.join()
+
+    def __enter__(self) -> "PartitionedDetector":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def find_deadlocks(self) -> list[DeadlockComponent]:
+        """Every deadlocked component of the whole graph, as DeadlockDetector.find_deadlocks would find it"""
+        start = time.perf_counter()
+        exits = self._ask([("exits", None)] * len(self.connections))
+        wanted = sorted(set().union(*exits))
+        summaries = self._ask([("summarize", wanted)] * len(self.connections))
+
+        boundary = nx.DiGraph()
+        owner = {}
+        for k, (entries, targets, entry_scc, link_bytes, _) in enumerate(summaries):
+            for entry in entries:
+                if owner.setdefault(entry, k) != k:
+                    raise ValueError(f"process {entry!r} has wait edges in partitions {owner[entry]} and {k}")
+            links = np.frombuffer(link_bytes, dtype=np.int32).reshape(-1, 2).tolist()
+            self.stats.summary_links += len(links)
+            count = 1 + max((a for a, _ in links), default=-1)
+            # a partition's SCCs are (k, id) nodes; processes keep their names, which joins the partitions
+            node = [(k, a) for a in range(count)] + targets
+            boundary.add_edges_from((node[a], node[b]) for a, b in links)
+            boundary.add_edges_from((entry, (k, a)) for entry, a in
+                                    zip(entries, np.frombuffer(entry_scc, dtype=np.int32).tolist()) if a >= 0)
+
+        spanning = [c for c in nx.strongly_connected_components(boundary) if len(c) > 1]
+        cycles = []
+        requests = [[] for _ in self.connections]
+        for key, members in enumerate(spanning):
+            names = [p for p in members if isinstance(p, str)]
+            # the processes on one cycle, each followed in it by the process it leads to
+            on_cycle = [u for u, _ in nx.find_cycle(boundary.subgraph(members)) if isinstance(u, str)]
+            cycle = list(zip(on_cycle, on_cycle[1:] + on_cycle[:1]))
+            cycles.append(cycle)
+            for k in {owner[p] for p in names}:
+                hops = [(entry, target) for entry, target in cycle if owner[entry] == k]
+                requests[k].append((key, [p for p in names if owner[p] == k], sorted(names), hops))
+
+        # a local deadlock whose SCC is in a spanning component is part of that one
+        spanning_nodes = set().union(*spanning)
+        wanted_local = []
+        for k, (*_, deadlock_scc) in enumerate(summaries):
+            ids = np.frombuffer(deadlock_scc, dtype=np.int32).tolist()
+            wanted_local.append([i for i, a in enumerate(ids) if (k, a) not in spanning_nodes])
+
+        components = []
+        if spanning or any(wanted_local):
+            processes = [set() for _ in spanning]
+            stretches = [{} for _ in spanning]
+            for replies, local in self._ask([("expand", (r, w)) for r, w in zip(requests, wanted_local)]):
+                for key, members, paths in replies:
+                    processes[key].update(members)
+                    stretches[key].update(paths)
+                components.extend(DeadlockComponent(members, cycle) for members, cycle in local)
+            for key, cycle in enumerate(cycles):
+                edges = []
+                for hop in cycle:
+                    path = stretches[key][hop]
+                    edges.extend(zip(path, path[1:]))
+                    edges.append((path[-1], hop[1]))
+                components.append(DeadlockComponent(tuple(sorted(processes[key])), _simple_cycle(edges)))
+        self.stats.seconds += time.perf_counter() - start
+        return components
+
+    def _ask(self, messages: list) -> list:
+        for conn, message in zip(self.connections, messages):
+            data = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+            self.stats.bytes_sent += len(data)
+            conn.send_bytes(data)
+        replies = []
+        for k, conn in enumerate(self.connections):
+            data = conn.recv_bytes()
+            self.stats.bytes_sent += len(data)
+            status, reply = pickle.loads(data)
+            if status == "error":
+                raise ValueError(f"partition {k}: {reply}")
+            replies.append(reply)
+        self.stats.messages += 2 * len(self.connections)
+        return replies
+
+def _address(text: str) -> tuple[str, int]:
+    host, _, port = text.rpartition(":")
+    if not host or not port.isdigit():
+        raise argparse.ArgumentTypeError(f"expected HOST:PORT, got {text!r}")
+    return host, int(port)
+
+def main(argv=None) -> int:
+    """Exit status as in core.cli: 0 without a deadlock, 1 with one, 2 on unreadable input"""
+    from core.cli import components_json
+    from core.graph_manager import GraphManager
+    parser = argparse.ArgumentParser(description="Partitioned deadlock detection")
+    parser.add_argument("--authkey", default=os.environ.get("DEADLOCK_AUTHKEY"),
+                        help="shared secret for serve/detect connections (default $DEADLOCK_AUTHKEY)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_cmd = commands.add_parser("serve", help="serve this host's part of the graph")
+    serve_cmd.add_argument("address", type=_address)
+    serve_cmd.add_argument("path", help="this host's wait edges (.csv, .jsonl, .wfg, .wfgs)")
+    detect_cmd = commands.add_parser("detect", help="coordinate partitions that are already serving")
+    detect_cmd.add_argument("addresses", type=_address, nargs="+")
+    local_cmd = commands.add_parser("local", help="split one graph file across local partition processes")
+    local_cmd.add_argument("--partitions", type=int, default=os.cpu_count() or 1)
+    local_cmd.add_argument("path")
+    args = parser.parse_args(argv)
+    authkey = args.authkey.encode() if args.authkey else None
+
+    try:
+        if args.command == "serve":
+            graph = GraphManager().load(args.path)
+            serve_address(args.address, Partition.from_graph(graph), authkey)
+            return 0
+        if args.command == "detect":
+            coordinator = PartitionedDetector.connect(args.addresses, authkey)
+        else:
+            graph = GraphManager().load(args.path)
+            coordinator = PartitionedDetector.spawn(split_graph(graph, args.partitions))
+    except (AuthenticationError, OSError, ValueError) as e:
+        print(json.dumps({"error": str(e)}), flush=True)
+        return 2
+    with coordinator:
+        components = coordinator.find_deadlocks()
+    stats = coordinator.stats
+    print(json.dumps({"partitions": stats.partitions, "deadlocks": components_json(components),
+                      "bytes_exchanged": stats.bytes_sent, "summary_links": stats.summary_links,
+                      "detect_seconds": round(stats.seconds, 6)}), flush=True)
+    return 1 if components else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
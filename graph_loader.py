@@ -0,0 +1,202 @@
+import csv
+import json
+import os
+import struct
+from typing import BinaryIO, Iterable, Iterator, Sequence
+import numpy as np
+
+# Binary edge format: MAGIC, uint32 name count, then per name a uint16 byte
+# length and UTF-8 bytes, then (waiter, holder) uint32 index pairs until EOF.
+# All integers are little-endian.
+BINARY_MAGIC = b"WFG1"
+CHUNK_EDGES = 1 << 16
+
+# Snapshot format: a fixed header, then the graph's CSR arrays and its name
+# table, each starting on an 8-byte boundary so they can be mapped in place:
+#   SNAPSHOT_MAGIC, uint32 reserved, uint64 processes, uint64 edges, uint64 name bytes
+#   int64 indptr[processes + 1], uint32 indices[edges], padding,
+#   names as NUL-separated UTF-8
+SNAPSHOT_MAGIC = b"WFS1"
+SNAPSHOT_HEADER = struct.Struct("<4sIQQQ")
+
+FORMATS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".wfg": "binary",
+    ".bin": "binary",
+    ".wfgs": "snapshot",
+}
+
+def detect_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Unknown graph file extension {ext!r}; expected one of {', '.join(FORMATS)}")
+    return FORMATS[ext]
+
+class NameTable:
+    """Interns process names to dense integer ids in first-seen order"""
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.ids = {}
+        self.names = []
+        for name in names:
+            self.intern(name)
+
+    def intern(self, name: str) -> int:
+        pid = self.ids.get(name)
+        if pid is None:
+            pid = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return pid
+
+def iter_csv_chunks(path: str, chunk_size: int = CHUNK_EDGES) -> Iterator[list[tuple[str, str]]]:
+    """Yield lists of (waiter, holder) name pairs from a two-column CSV, line by line"""
+    with open(path, newline="", encoding="utf-8") as f:
+        chunk = []
+        for lineno, row in enumerate(csv.reader(f), 1):
+            if not row or row[0].startswith("#"):
+                continue
+            if len(row) < 2:
+                raise ValueError(f"{path}:{lineno}: expected 'waiter,holder'")
+            waiter, holder = row[0].strip(), row[1].strip()
+            if lineno == 1 and waiter.lower() == "waiter":
+                continue  # header
+            chunk.append((waiter, holder))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+def iter_jsonl_chunks(path: str, chunk_size: int = CHUNK_EDGES) -> Iterator[list[tuple[str, str]]]:
+    """Yield (waiter, holder) pairs from JSONL records: {"waiter": .., "holder": ..} or [waiter, holder]"""
+    with open(path, encoding="utf-8") as f:
+        chunk = []
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, dict):
+                try:
+                    chunk.append((str(record["waiter"]), str(record["holder"])))
+                except KeyError as e:
+                    raise ValueError(f"{path}:{lineno}: missing field {e.args[0]!r}") from None
+            elif isinstance(record, list) and len(record) >= 2:
+                chunk.append((str(record[0]), str(record[1])))
+            else:
+                raise ValueError(f"{path}:{lineno}: expected an object or a [waiter, holder] list")
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+def _read_exactly(f: BinaryIO, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError(f"{getattr(f, 'name', 'binary file')}: truncated name table")
+    return data
+
+def read_binary_header(f: BinaryIO) -> list[str]:
+    if f.read(4) != BINARY_MAGIC:
+        raise ValueError(f"{getattr(f, 'name', 'binary file')}: not a wait-for graph binary file")
+    (count,) = struct.unpack("<I", _read_exactly(f, 4))
+    names = []
+    for _ in range(count):
+        (length,) = struct.unpack("<H", _read_exactly(f, 2))
+        names.append(_read_exactly(f, length).decode("utf-8"))
+    return names
+
+def read_binary_names(path: str) -> tuple[list[str], int]:
+    """Return the name table and the byte offset where edge records start"""
+    with open(path, "rb") as f:
+        names = read_binary_header(f)
+        return names, f.tell()
+
+def iter_binary_chunks(path: str, offset: int, names: int, chunk_size: int = CHUNK_EDGES) -> Iterator[np.ndarray]:
+    """Yield (k, 2) arrays of (waiter, holder) ids, each below names, without reading the whole file"""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while True:
+            buf = f.read(chunk_size * 8)
+            if not buf:
+                return
+            if len(buf) % 8:
+                raise ValueError(f"{path}: truncated edge record")
+            ids = np.frombuffer(buf, dtype="<u4").reshape(-1, 2)
+            if ids.max() >= names:
+                raise ValueError(f"{path}: edge refers to process id {int(ids.max())} of {names}")
+            yield ids
+
+def write_binary(path: str, processes: Sequence[str], edges: Iterable[tuple[int, int]]) -> None:
+    """Write (waiter, holder) index pairs in the binary edge format"""
+    with open(path, "wb") as f:
+        f.write(BINARY_MAGIC)
+        f.write(struct.pack("<I", len(processes)))
+        for name in processes:
+            data = name.encode("utf-8")
+            f.write(struct.pack("<H", len(data)))
+            f.write(data)
+        chunk = []
+        for u, v in edges:
+            chunk.append((u, v))
+            if len(chunk) >= CHUNK_EDGES:
+                f.write(np.asarray(chunk, dtype="<u4").tobytes())
+                chunk = []
+        if chunk:
+            f.write(np.asarray(chunk, dtype="<u4").tobytes())
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) & ~7
+
+def write_snapshot(path: str, processes: Sequence[str], indptr, indices) -> None:
+    """Write CSR arrays (row i waits on indices[indptr[i]:indptr[i + 1]]) as a snapshot"""
+    indptr = np.asarray(indptr, dtype="<i8")
+    indices = np.asarray(indices, dtype="<u4")
+    if indptr.shape != (len(processes) + 1,) or indices.shape != (int(indptr[-1]),):
+        raise ValueError("indptr must have len(processes) + 1 entries ending at len(indices)")
+    if any("\0" in name for name in processes):
+        raise ValueError("process names must not contain NUL")
+    blob = "\0".join(processes).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, 0, len(processes), indices.size, len(blob)))
+        indptr.tofile(f)
+        indices.tofile(f)
+        f.write(b"\0" * (_aligned(f.tell()) - f.tell()))
+        f.write(blob)
+
+def map_snapshot(path: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Map a snapshot read-only and return (name bytes, indptr, indices) as views of the file.
+
+    Nothing is read or copied up front; pages come in as the arrays are used.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.read(SNAPSHOT_HEADER.size)
+    if len(header) < SNAPSHOT_HEADER.size or header[:4] != SNAPSHOT_MAGIC:
+        raise ValueError(f"{path}: not a wait-for graph snapshot")
+    _, _, n, m, name_bytes = SNAPSHOT_HEADER.unpack(header)
+    indptr_at = SNAPSHOT_HEADER.size
+    indices_at = indptr_at + 8 * (n + 1)
+    names_at = _aligned(indices_at + 4 * m)
+    if names_at + name_bytes != size:
+        raise ValueError(f"{path}: snapshot size does not match its header")
+
+    def view(dtype, offset, count):
+        # np.memmap refuses zero-length maps
+        if not count:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+
+    indptr = view("<i8", indptr_at, n + 1)
+    if indptr[0] != 0 or indptr[-1] != m:
+        raise ValueError(f"{path}: corrupt snapshot offsets")
+    return view(np.uint8, names_at, name_bytes), indptr, view("<u4", indices_at, m)
+
+def decode_names(blob: np.ndarray, count: int) -> list[str]:
+    names = blob.tobytes().decode("utf-8").split("\0") if count else []
+    if len(names) != count:
+        raise ValueError(f"snapshot has {len(names)} names for {count} processes")
+    return names
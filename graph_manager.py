@@ -1,20 +1,344 @@
+import time
+from array import array
+from typing import Callable, Iterable, Sequence
 import networkx as nx
+import numpy as np
+from core.compact_graph import CompactGraph
+from core.detection_cache import GraphFingerprint
+from core.graph_loader import (
+    NameTable, detect_format, iter_binary_chunks, iter_csv_chunks, iter_jsonl_chunks, read_binary_names,
+    write_binary,
+)
+from core.history import ADD_EDGE, REMOVE_EDGE, REMOVE_NODE, GraphHistory
+from core.incremental_detector import IncrementalDetector
+from core.matrix_backend import graph_to_matrix, matrix_to_graph, table_to_matrix
+from core.metrics import timed
+from core.rag import ResourceAllocationGraph
+from core.risk import RiskModel, RiskScorer
+from core.types import DeadlockComponent
+
+DEFAULT_PROCESSES = ["P1", "P2", "P3", "P4", "P5"]
 
 class GraphManager:
     def __init__(self):
         self.graph = nx.DiGraph()
+        self.processes = list(DEFAULT_PROCESSES)
+        self.incremental = None
+        self._fingerprint = None
+        self.matrix = None
+        self.compact = None
+        self.rag = None
+        self.history = None
+        self.risk = None
 
-    def build_from_table(self, table_data: list[list[str]]) -> nx.DiGraph:
+    @timed("build_graph")
+    def build_from_table(self, table_data: list[list[str]],
+                         processes: Sequence[str] = None) -> nx.DiGraph:
         """Build graph from table data"""
         self.graph = nx.DiGraph()
-        processes = ["P1", "P2", "P3", "P4", "P5"]
-        
-        for i in range(5):
-            for j in range(5):
-                if table_data[i][j] == "1":
-                    self.graph.add_edge(processes[i], processes[j])
-        
+        self.incremental = None
+        self._fingerprint = None
+        self.rag = None
+        self.processes = list(processes) if processes else list(DEFAULT_PROCESSES)
+        n = min(len(self.processes), len(table_data))
+        self.graph.add_nodes_from(self.processes[:n])
+
+        for i in range(n):
+            row = table_data[i]
+            for j in range(min(n, len(row))):
+                if row[j] == "1":
+                    self.graph.add_edge(self.processes[i], self.processes[j])
+
+        return self._replaced()
+
+    @timed("build_graph")
+    def build_from_edges(self, processes: Sequence[str],
+                         edges: Iterable[tuple[int, int]]) -> nx.DiGraph:
+        """Build graph from an edge list of (waiter, holder) process indices"""
+        self.processes = list(processes)
+        self.graph = nx.DiGraph()
+        self.incremental = None
+        self._fingerprint = None
+        self.rag = None
+        self.graph.add_nodes_from(self.processes)
+        names = self.processes
+        self.graph.add_edges_from((names[u], names[v]) for u, v in edges)
+        return self._replaced()
+
+    @timed("build_graph")
+    def build_from_csr(self, processes: Sequence[str], indptr: Sequence[int],
+                       indices: Sequence[int]) -> nx.DiGraph:
+        """Build graph from CSR arrays: row i waits on indices[indptr[i]:indptr[i + 1]]"""
+        if len(indptr) != len(processes) + 1:
+            raise ValueError("indptr must have len(processes) + 1 entries")
+        names = list(processes)
+        edges = (
+            (i, int(indices[k]))
+            for i in range(len(names))
+            for k in range(int(indptr[i]), int(indptr[i + 1]))
+        )
+        return self.build_from_edges(names, edges)
+
+    @timed("load")
+    def load(self, path: str, fmt: str = None) -> nx.DiGraph:
+        """Stream an edge-list file (csv, jsonl or binary) into a fresh graph, one chunk at a time"""
+        fmt = fmt or detect_format(path)
+        self.graph = nx.DiGraph()
+        self.incremental = None
+        self._fingerprint = None
+        self.matrix = None
+        self.rag = None
+        if fmt == "snapshot":
+            self.compact = CompactGraph.open(path)
+            return self.graph_from_compact()
+        if fmt == "binary":
+            names, offset = read_binary_names(path)
+            self.graph.add_nodes_from(names)
+            for pairs in iter_binary_chunks(path, offset, len(names)):
+                self.graph.add_edges_from((names[u], names[v]) for u, v in pairs.tolist())
+            self.processes = names
+            return self._replaced()
+
+        chunks = {"csv": iter_csv_chunks, "jsonl": iter_jsonl_chunks}.get(fmt)
+        if chunks is None:
+            raise ValueError(f"Unknown graph file format {fmt!r}")
+        table = NameTable()
+        for chunk in chunks(path):
+            for waiter, holder in chunk:
+                table.intern(waiter)
+                table.intern(holder)
+            self.graph.add_edges_from(chunk)
+        self.processes = table.names
+        return self._replaced()
+
+    @timed("load")
+    def load_compact(self, path: str, fmt: str = None) -> CompactGraph:
+        """Stream an edge-list file into a CompactGraph instead of a DiGraph; kept as self.compact.
+
+        Edges are gathered as uint32 id pairs, so peak memory stays a few
+        bytes per edge; self.graph is left as it was. A snapshot is mapped
+        rather than read, so it loads in constant time.
+        """
+        fmt = fmt or detect_format(path)
+        if fmt == "snapshot":
+            self.compact = CompactGraph.open(path)
+            return self.compact
+        if fmt == "binary":
+            names, offset = read_binary_names(path)
+            pairs = list(iter_binary_chunks(path, offset, len(names)))
+            edges = np.concatenate(pairs) if pairs else np.zeros((0, 2), dtype=np.uint32)
+            src, dst = edges[:, 0], edges[:, 1]
+        else:
+            chunks = {"csv": iter_csv_chunks, "jsonl": iter_jsonl_chunks}.get(fmt)
+            if chunks is None:
+                raise ValueError(f"Unknown graph file format {fmt!r}")
+            table = NameTable()
+            src, dst = array("I"), array("I")
+            for chunk in chunks(path):
+                for waiter, holder in chunk:
+                    src.append(table.intern(waiter))
+                    dst.append(table.intern(holder))
+            names = table.names
+        self.compact = CompactGraph.from_edges(names, src, dst)
+        return self.compact
+
+    def graph_from_compact(self) -> nx.DiGraph:
+        """Materialize the compact backend as a DiGraph (e.g. for the GUI or add_edge)"""
+        self.graph = self.compact.to_networkx()
+        self.processes = list(self.compact)
+        self.incremental = None
+        self._fingerprint = None
+        return self._replaced()
+
+    def build_from_rag(self, rag: ResourceAllocationGraph) -> nx.DiGraph:
+        """Keep the resource model and use its collapsed wait-for graph as the graph"""
+        self.rag = rag
+        self.processes = list(rag.processes)
+        self.graph = rag.wait_for_graph()
+        self.incremental = None
+        self._fingerprint = None
+        self.matrix = None
+        return self._replaced()
+
+    @timed("load")
+    def load_rag(self, path: str) -> nx.DiGraph:
+        return self.build_from_rag(ResourceAllocationGraph.load(path))
+
+    def resources_held(self, processes: Sequence[str]) -> list[int]:
+        """Instances each process holds according to the resource model (0 when unknown)"""
+        if self.rag is None:
+            return [0] * len(processes)
+        held = dict(zip(self.rag.processes, self.rag.resources_held().tolist()))
+        return [held.get(p, 0) for p in processes]
+
+    def save_binary(self, path: str) -> None:
+        """Write the current graph in the compact binary edge format"""
+        table = NameTable(self.processes)
+        for node in self.graph.nodes:
+            table.intern(node)
+        ids = table.ids
+        write_binary(path, table.names, ((ids[u], ids[v]) for u, v in self.graph.edges))
+
+    def save_snapshot(self, path: str) -> None:
+        """Write the current graph as a memory-mappable snapshot (see CompactGraph.open)"""
+        table = NameTable(self.processes)
+        for node in self.graph.nodes:
+            table.intern(node)
+        ids = table.ids
+        m = self.graph.number_of_edges()
+        src = np.fromiter((ids[u] for u, _ in self.graph.edges), dtype=np.int64, count=m)
+        dst = np.fromiter((ids[v] for _, v in self.graph.edges), dtype=np.int64, count=m)
+        CompactGraph.from_edges(table.names, src, dst).save(path)
+
+    def build_matrix(self, table_data, processes: Sequence[str] = None) -> np.ndarray:
+        """Keep the wait-for relation as a uint8 adjacency matrix instead of a DiGraph.
+
+        table_data may be "0"/"1" table cells or any 2-D array-like of 0/1.
+        """
+        if isinstance(table_data, np.ndarray):
+            matrix = (table_data != 0).astype(np.uint8)
+        else:
+            matrix = table_to_matrix(table_data)
+        n = matrix.shape[0]
+        self.processes = list(processes) if processes else [f"P{i + 1}" for i in range(n)]
+        self.matrix = matrix
+        return matrix
+
+    def to_matrix(self) -> np.ndarray:
+        """Adjacency matrix of the current graph, ordered like self.processes"""
+        self.matrix = graph_to_matrix(self.graph, self.processes)
+        return self.matrix
+
+    def graph_from_matrix(self) -> nx.DiGraph:
+        """Materialize the matrix backend as a DiGraph (e.g. for find_deadlocks)"""
+        self.graph = matrix_to_graph(self.matrix, self.processes)
+        self.incremental = None
+        self._fingerprint = None
+        return self._replaced()
+
+    def table_window(self, start: int = 0, size: int = 5) -> tuple[list[str], list[list[str]]]:
+        """Return process labels and "0"/"1" cells for a size x size window of the graph"""
+        labels = self.processes[start:start + size]
+        index = {p: i for i, p in enumerate(labels)}
+        cells = [["0"] * len(labels) for _ in labels]
+        for i, p in enumerate(labels):
+            if p not in self.graph:
+                continue
+            for q in self.graph.successors(p):
+                j = index.get(q)
+                if j is not None:
+                    cells[i][j] = "1"
+        return labels, cells
+
+    def add_edge(self, waiter: str, holder: str) -> DeadlockComponent:
+        """Record that waiter waits on holder; return the deadlock this edge closes, if any"""
+        if waiter not in self.graph:
+            self.processes.append(waiter)
+        if holder not in self.graph and holder != waiter:
+            self.processes.append(holder)
+        is_new = not self.graph.has_edge(waiter, holder)
+        if self._fingerprint is not None and is_new:
+            self._fingerprint.add(waiter, holder)
+        closed = self._incremental().add_edge(waiter, holder)
+        if is_new:
+            self._record(ADD_EDGE, waiter, holder)
+            if self.risk is not None:
+                self.risk.edge_added(waiter, holder)
+        return closed
+
+    def set_edge(self, waiter: str, holder: str, waits: bool) -> None:
+        """Set one cell of the wait-for matrix; unlike add_edge, never builds the online detector"""
+        if waits == self.graph.has_edge(waiter, holder):
+            return
+        if self._fingerprint is not None:
+            (self._fingerprint.add if waits else self._fingerprint.remove)(waiter, holder)
+        if waits:
+            self.graph.add_edge(waiter, holder)
+        else:
+            self.graph.remove_edge(waiter, holder)
+        self.incremental = None  # rebuilt from the graph if add_edge is used later
+        self._record(ADD_EDGE if waits else REMOVE_EDGE, waiter, holder)
+        if self.risk is not None:
+            (self.risk.edge_added if waits else self.risk.edge_removed)(waiter, holder)
+
+    def remove_edge(self, waiter: str, holder: str) -> None:
+        existed = self.graph.has_edge(waiter, holder)
+        if self._fingerprint is not None and existed:
+            self._fingerprint.remove(waiter, holder)
+        self._incremental().remove_edge(waiter, holder)
+        if existed:
+            self._record(REMOVE_EDGE, waiter, holder)
+            if self.risk is not None:
+                self.risk.edge_removed(waiter, holder)
+
+    def remove_node(self, process: str) -> None:
+        existed = process in self.graph
+        if self.risk is not None and existed:
+            self.risk.node_removing(process)
+        if self._fingerprint is not None and existed:
+            for waiter in self.graph._pred[process]:
+                self._fingerprint.remove(waiter, process)
+            for holder in self.graph._succ[process]:
+                if holder != process:  # a self-loop is in both maps
+                    self._fingerprint.remove(process, holder)
+        self._incremental().remove_node(process)
+        if process in self.processes:
+            self.processes.remove(process)
+        if existed:
+            self._record(REMOVE_NODE, process, None)
+
+    def has_deadlock(self) -> bool:
+        return self._incremental().has_deadlock()
+
+    def fingerprint(self) -> tuple[int, int]:
+        """Cache key of the current edge set (see DetectionCache); O(1) once built"""
+        if self._fingerprint is None:
+            self._fingerprint = GraphFingerprint.of_graph(self.graph)
+        return self._fingerprint.key
+
+    def invalidate(self) -> None:
+        """Forget derived state after self.graph was changed directly, e.g. by a resolver"""
+        self.incremental = None
+        self._fingerprint = None
+        if self.history is not None:
+            self.history.checkpoint(self.graph)  # the individual changes are unknown
+        if self.risk is not None:
+            self.risk.reset()
+
+    def record_history(self, history: GraphHistory = None) -> GraphHistory:
+        """Record every later change of the graph, starting from a checkpoint of the current one"""
+        self.history = history or GraphHistory()
+        self.history.checkpoint(self.graph)
+        return self.history
+
+    def track_risk(self, model: RiskModel = None, clock: Callable[[], float] = time.time) -> RiskScorer:
+        """Keep per-process deadlock risk current with every later change (see core.risk)"""
+        self.risk = RiskScorer(self, model, clock)
+        return self.risk
+
+    def graph_at(self, version: int) -> nx.DiGraph:
+        """The graph as it was at a recorded version (read-only; see GraphHistory)"""
+        if self.history is None:
+            raise ValueError("history is not being recorded; call record_history() first")
+        return self.history.graph_at(version)
+
+    def _record(self, op: int, u: str, v: str) -> None:
+        if self.history is not None:
+            self.history.record(op, u, v, self.graph)
+
+    def _replaced(self) -> nx.DiGraph:
+        # the graph was rebuilt wholesale; history resumes from a fresh checkpoint
+        if self.history is not None:
+            self.history.checkpoint(self.graph)
+        if self.risk is not None:
+            self.risk.reset()
         return self.graph
 
+    def _incremental(self) -> IncrementalDetector:
+        # built on first use, then kept in step with every edge update
+        if self.incremental is None or self.incremental.graph is not self.graph:
+            self.incremental = IncrementalDetector(self.graph)
+        return self.incremental
+
     def get_graph(self) -> nx.DiGraph:
         return self.graph
@@ -0,0 +1,181 @@
+"""Time-travel history of a wait-for graph: compact deltas between full checkpoints.
+
+    history = GraphHistory()
+    manager.record_history(history)       # every edit is now recorded
+    past = history.graph_at(history.version_at(some_time))
+
+History is a list of segments. Each segment starts with a full checkpoint,
+stored as uint32 arrays of interned process ids, and is followed by the
+deltas made after it, each one op byte, two ids and a timestamp. A segment
+is closed once its deltas outnumber its checkpoint's nodes and edges. That
+keeps checkpointing amortized O(1) per change and bounds the replay that
+rebuilding any version needs. When the history grows past max_bytes,
+whole segments are evicted from the old end; only the newest segment is
+always kept, even if it alone is larger.
+"""
+import bisect
+import time
+from array import array
+from typing import Iterator, Optional
+import networkx as nx
+from core.graph_loader import NameTable
+
+ADD_EDGE, REMOVE_EDGE, REMOVE_NODE = range(3)
+CHECKPOINT = 3  # only in replay(): the graph was replaced wholesale
+
+class _Segment:
+    __slots__ = ("version", "nodes", "edges", "ops", "us", "vs", "times")
+
+    def __init__(self, version: int, nodes: array, edges: array, stamp: float):
+        self.version = version  # the checkpoint is this version; delta k makes version + k + 1
+        self.nodes = nodes
+        self.edges = edges  # flattened (waiter, holder) id pairs
+        self.ops = array("B")
+        self.us = array("I")
+        self.vs = array("I")
+        self.times = array("d", [stamp])  # times[k] is when version + k was reached
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.itemsize * len(a) for a in (self.nodes, self.edges, self.ops, self.us, self.vs, self.times))
+
+    @property
+    def last(self) -> int:
+        return self.version + len(self.ops)
+
+class GraphHistory:
+    """Records graph changes and rebuilds the graph as it was at any recorded version.
+
+    Versions count changes: each recorded delta or checkpoint is one more.
+    Graphs returned by graph_at are shared with the history's scrub cursor
+    and must be treated as read-only; copy one to keep it.
+    """
+
+    def __init__(self, interval: int = 4096, max_bytes: int = 64 << 20):
+        if interval < 1 or max_bytes < 1:
+            raise ValueError("interval and max_bytes must be positive")
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.names = NameTable()
+        self.segments = []
+        self.nbytes = 0
+        self.evicted = 0  # segments dropped to stay under max_bytes
+        self._cursor = None  # (version, graph) last rebuilt, so scrubbing forward only replays the gap
+
+    @property
+    def version(self) -> int:
+        """The latest version; -1 before the first checkpoint"""
+        return self.segments[-1].last if self.segments else -1
+
+    @property
+    def oldest(self) -> int:
+        """The earliest version that can still be rebuilt"""
+        return self.segments[0].version if self.segments else -1
+
+    @property
+    def last_rebuild(self) -> int:
+        """The newest version recorded as a whole graph rather than as a change"""
+        for k in range(len(self.segments) - 1, 0, -1):
+            if self.segments[k].version != self.segments[k - 1].last:
+                return self.segments[k].version
+        return self.oldest
+
+    def checkpoint(self, graph: nx.DiGraph) -> None:
+        """Record the full graph as a new version, e.g. after it was rebuilt or edited directly"""
+        self._start_segment(graph, self.version + 1, time.time())
+
+    def record(self, op: int, u: str, v: Optional[str], graph: nx.DiGraph) -> None:
+        """Append one change; graph is the state after it, checkpointed when the segment is full"""
+        if not self.segments:
+            self.checkpoint(graph)
+            return
+        segment = self.segments[-1]
+        ids = self.names.intern
+        segment.ops.append(op)
+        segment.us.append(ids(u))
+        segment.vs.append(ids(v) if v is not None else 0)
+        segment.times.append(time.time())
+        self.nbytes += 17
+        if len(segment.ops) >= max(self.interval, len(segment.nodes) + len(segment.edges) // 2):
+            # same version, now also reachable without replaying this segment
+            self._start_segment(graph, self.version, segment.times[-1])
+        else:
+            self._evict()
+
+    def graph_at(self, version: int) -> nx.DiGraph:
+        """The graph as it was at version, rebuilt from the nearest checkpoint or the scrub cursor"""
+        if not self.oldest <= version <= self.version:
+            raise ValueError(f"version {version} is not in the history ({self.oldest}..{self.version})")
+        segment = self.segments[bisect.bisect_right([s.version for s in self.segments], version) - 1]
+        if self._cursor is not None and segment.version <= self._cursor[0] <= version:
+            start, graph = self._cursor
+        else:
+            start, graph = segment.version, self._restore(segment)
+        names = self.names.names
+        for k in range(start - segment.version, version - segment.version):
+            op, u = segment.ops[k], names[segment.us[k]]
+            if op == ADD_EDGE:
+                graph.add_edge(u, names[segment.vs[k]])
+            elif op == REMOVE_EDGE:
+                graph.remove_edge(u, names[segment.vs[k]])
+            else:
+                graph.remove_node(u)
+        self._cursor = (version, graph)
+        return graph
+
+    def replay(self, start: int = None) -> Iterator[tuple[int, float, int, object, Optional[str]]]:
+        """Recorded changes as (version, time, op, u, v), from the first checkpoint at or after start.
+
+        That checkpoint, and every later rebuild, comes out as a CHECKPOINT
+        event whose u is a fresh DiGraph of the whole graph.
+        """
+        names = self.names.names
+        previous = None
+        for segment in list(self.segments):
+            if start is not None and segment.version < start:
+                continue
+            if previous is None or segment.version != previous.last:
+                yield segment.version, segment.times[0], CHECKPOINT, self._restore(segment), None
+            for k, op in enumerate(segment.ops):
+                v = names[segment.vs[k]] if op != REMOVE_NODE else None
+                yield segment.version + k + 1, segment.times[k + 1], op, names[segment.us[k]], v
+            previous = segment
+
+    def time_of(self, version: int) -> float:
+        """When version was reached, in seconds since the epoch"""
+        for segment in self.segments:
+            if segment.version <= version <= segment.last:
+                return segment.times[version - segment.version]
+        raise ValueError(f"version {version} is not in the history ({self.oldest}..{self.version})")
+
+    def version_at(self, stamp: float) -> int:
+        """The version that was current at stamp (the oldest one if stamp is earlier)"""
+        for segment in reversed(self.segments):
+            if segment.times[0] <= stamp:
+                return segment.version + bisect.bisect_right(segment.times, stamp) - 1
+        return self.oldest
+
+    def _start_segment(self, graph: nx.DiGraph, version: int, stamp: float) -> None:
+        ids = self.names.intern
+        nodes = array("I", map(ids, graph))
+        edges = array("I")
+        for u, v in graph.edges:
+            edges.append(ids(u))
+            edges.append(ids(v))
+        segment = _Segment(version, nodes, edges, stamp)
+        self.segments.append(segment)
+        self.nbytes += segment.nbytes
+        self._evict()
+
+    def _restore(self, segment: _Segment) -> nx.DiGraph:
+        names = self.names.names
+        graph = nx.DiGraph()
+        graph.add_nodes_from(names[i] for i in segment.nodes)
+        edges = segment.edges
+        graph.add_edges_from((names[edges[k]], names[edges[k + 1]]) for k in range(0, len(edges), 2))
+        return graph
+
+    def _evict(self) -> None:
+        while self.nbytes > self.max_bytes and len(self.segments) > 1:
+            self.nbytes -= self.segments.pop(0).nbytes
+            self.evicted += 1
@@ -0,0 +1,129 @@
+import networkx as nx
+from core.types import DeadlockComponent
+
+class IncrementalDetector:
+    """Online cycle detection over a wait-for graph (Pearce-Kelly dynamic topological order).
+
+    The graph minus the ``pending`` edges is kept acyclic together with a
+    topological order of its nodes. An inserted edge that would close a cycle
+    is kept in the graph but parked in ``pending``, so the graph is deadlocked
+    exactly when ``pending`` is non-empty. Insertions only search the nodes
+    whose order lies between the edge's endpoints.
+    """
+
+    def __init__(self, graph: nx.DiGraph):
+        self.graph = graph
+        self.order = {}
+        self._next = 0
+        for u in graph.nodes:
+            self._place(u)
+        # edges not inserted yet must stay out of the searches, just like parked ones
+        self.pending = set(graph.edges)
+        for edge in list(self.pending):
+            self.pending.discard(edge)
+            self._insert(*edge)
+
+    def add_edge(self, u, v) -> DeadlockComponent:
+        """Insert u -> v; return the deadlock it closes, or None"""
+        if self.graph.has_edge(u, v):
+            return None
+        self.graph.add_edge(u, v)
+        self._place(u)
+        self._place(v)
+        return self._insert(u, v)
+
+    def remove_edge(self, u, v) -> None:
+        if not self.graph.has_edge(u, v):
+            return
+        self.graph.remove_edge(u, v)
+        if (u, v) in self.pending:
+            self.pending.discard((u, v))
+        else:
+            # an ordered edge may have carried the path behind a pending edge
+            self._retry_pending()
+
+    def remove_node(self, u) -> None:
+        if u not in self.graph:
+            return
+        incident = [(w, u) for w in self.graph._pred[u]] + [(u, w) for w in self.graph._succ[u]]
+        self.graph.remove_node(u)
+        self.order.pop(u, None)
+        had_ordered_edge = False
+        for edge in incident:
+            if edge in self.pending:
+                self.pending.discard(edge)
+            else:
+                had_ordered_edge = True
+        if had_ordered_edge:
+            self._retry_pending()
+
+    def has_deadlock(self) -> bool:
+        return bool(self.pending)
+
+    def _place(self, u):
+        if u not in self.order:
+            self.order[u] = self._next
+            self._next += 1
+
+    def _insert(self, x, y) -> DeadlockComponent:
+        order = self.order
+        lower, upper = order[y], order[x]
+        if lower > upper:
+            return None
+        if x == y:
+            self.pending.add((x, y))
+            return DeadlockComponent((x,), ((x, x),))
+
+        # forward search from y among nodes ordered at most ord[x]
+        parent = {y: None}
+        forward = [y]
+        stack = [y]
+        while stack:
+            w = stack.pop()
+            for z in self.graph._succ[w]:
+                if (w, z) in self.pending or z in parent:
+                    continue
+                if z == x:
+                    parent[x] = w
+                    return self._close_cycle(x, y, parent)
+                if order[z] < upper:
+                    parent[z] = w
+                    forward.append(z)
+                    stack.append(z)
+
+        # backward search from x among nodes ordered at least ord[y]
+        seen = {x}
+        backward = [x]
+        stack = [x]
+        while stack:
+            w = stack.pop()
+            for z in self.graph._pred[w]:
+                if (z, w) in self.pending or z in seen:
+                    continue
+                if order[z] > lower:
+                    seen.add(z)
+                    backward.append(z)
+                    stack.append(z)
+
+        # reassign the affected slots so that everything reaching x precedes y
+        backward.sort(key=order.__getitem__)
+        forward.sort(key=order.__getitem__)
+        nodes = backward + forward
+        slots = sorted(order[w] for w in nodes)
+        for w, slot in zip(nodes, slots):
+            order[w] = slot
+        return None
+
+    def _close_cycle(self, x, y, parent) -> DeadlockComponent:
+        self.pending.add((x, y))
+        path = [x]
+        while path[-1] != y:
+            path.append(parent[path[-1]])
+        path.reverse()  # y ... x, closed by the new edge x -> y
+        return DeadlockComponent(tuple(path), tuple(zip(path, path[1:] + path[:1])))
+
+    def _retry_pending(self):
+        for edge in list(self.pending):
+            # edges still parked stay excluded from the searches
+            self.pending.discard(edge)
+            self._insert(*edge)
@@ -0,0 +1,58 @@
+from typing import Sequence
+import numpy as np
+import networkx as nx
+from core.types import DeadlockType
+
+def table_to_matrix(table_data: list[list[str]]) -> np.ndarray:
+    """Turn "0"/"1" table cells into a uint8 wait-for matrix: A[i, j] == 1 means i waits on j"""
+    return (np.asarray(table_data, dtype=object) == "1").astype(np.uint8)
+
+def graph_to_matrix(graph: nx.DiGraph, processes: Sequence[str]) -> np.ndarray:
+    index = {p: i for i, p in enumerate(processes)}
+    matrix = np.zeros((len(processes), len(processes)), dtype=np.uint8)
+    pairs = [(index[u], index[v]) for u, v in graph.edges if u in index and v in index]
+    if pairs:
+        rows, cols = np.array(pairs).T
+        matrix[rows, cols] = 1
+    return matrix
+
+def matrix_to_graph(matrix: np.ndarray, processes: Sequence[str]) -> nx.DiGraph:
+    graph = nx.DiGraph()
+    graph.add_nodes_from(processes)
+    rows, cols = np.nonzero(matrix)
+    graph.add_edges_from((processes[i], processes[j]) for i, j in zip(rows.tolist(), cols.tolist()))
+    return graph
+
+def peel(matrix: np.ndarray) -> np.ndarray:
+    """Kahn peeling on degree vectors; returns the mask of processes left over.
+
+    Each round drops every process with no remaining in-edges or no remaining
+    out-edges and subtracts their rows/columns from the degree vectors. What is
+    left lies on a cycle or between two cycles, so an empty mask means acyclic.
+    """
+    a = matrix
+    alive = np.ones(a.shape[0], dtype=bool)
+    indeg = a.sum(axis=0, dtype=np.int32)
+    outdeg = a.sum(axis=1, dtype=np.int32)
+    while True:
+        drop = alive & ((indeg == 0) | (outdeg == 0))
+        if not drop.any():
+            return alive
+        alive &= ~drop
+        # edges leaving dropped processes no longer count towards in-degree, and vice versa
+        indeg -= a[drop].sum(axis=0, dtype=np.int32)
+        outdeg -= a[:, drop].sum(axis=1, dtype=np.int32)
+
+def classify_matrix(matrix: np.ndarray) -> DeadlockType:
+    """Same verdict as DeadlockDetector.detect, computed with whole-array operations"""
+    if matrix.size == 0 or not matrix.any():
+        return DeadlockType.NONE
+    if np.diagonal(matrix).any():
+        return DeadlockType.MUTUAL_EXCLUSION
+    if (matrix & matrix.T).any() or peel(matrix).any():
+        return DeadlockType.CIRCULAR_WAIT
+    indeg = matrix.sum(axis=0, dtype=np.int64)
+    outdeg = matrix.sum(axis=1, dtype=np.int64)
+    if ((indeg > 0) & (outdeg > 0)).any():
+        return DeadlockType.HOLD_AND_WAIT
+    return DeadlockType.NONE
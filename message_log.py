@@ -0,0 +1,79 @@
+"""Message log backend: bounded history, batched delivery to the UI and a rotating JSON-lines file.
+
+Messages are recorded as they arrive but reach the widget only when the UI
+drains them, at most max_batch at a time, so a flood of alerts costs one
+widget update per flush instead of one per message.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+from core.types import LogRecord
+
+DEFAULT_LOG_PATH = os.path.join("logs", "deadlock_events.jsonl")
+
+class MessageLog:
+    def __init__(self, history: int = 1000, path: Optional[str] = DEFAULT_LOG_PATH,
+                 max_bytes: int = 1_000_000, backups: int = 5, max_batch: int = 200):
+        self.history = deque(maxlen=history)  # oldest records fall off the front
+        self.max_batch = max_batch
+        self.recorded = 0
+        self.skipped = 0
+        self._pending = deque(maxlen=max_batch)
+        self._pending_total = 0
+        self._lock = threading.Lock()  # alerts may be recorded from other threads
+        self.file_logger = _file_logger(path, max_bytes, backups) if path else None
+
+    def add(self, kind: str, text: str, html: str) -> LogRecord:
+        """Record a message; html is what the widget shows once drained"""
+        record = LogRecord(time.time(), kind, text)
+        with self._lock:
+            self.history.append(record)
+            self._pending.append(html)
+            self._pending_total += 1
+            self.recorded += 1
+        if self.file_logger is not None:
+            self.file_logger.info(json.dumps(asdict(record), ensure_ascii=False))
+        return record
+
+    def drain(self) -> tuple[list[str], int]:
+        """Messages waiting for the widget, newest max_batch only, and how many older ones were skipped"""
+        with self._lock:
+            pending = list(self._pending)
+            skipped = self._pending_total - len(pending)
+            self._pending.clear()
+            self._pending_total = 0
+            self.skipped += skipped
+        return pending, skipped
+
+    def recent(self, kind: str = None) -> list[LogRecord]:
+        with self._lock:
+            return [r for r in self.history if kind is None or r.kind == kind]
+
+    def close(self) -> None:
+        if self.file_logger is not None:
+            for handler in self.file_logger.handlers:
+                handler.close()
+
+def _file_logger(path: str, max_bytes: int, backups: int) -> Optional[logging.Logger]:
+    # One logger per file, kept out of the root logger's handlers
+    logger = logging.getLogger(f"deadlock.events.{os.path.abspath(path)}")
+    if not logger.handlers:
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                          encoding="utf-8", delay=True)
+        except OSError:
+            return None  # read-only location: keep the in-memory history only
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
@@ -0,0 +1,225 @@
+"""Stage timers and counters that cost next to nothing while switched off.
+
+    from core.metrics import METRICS, timed
+    with METRICS.timer("classify"):       # a shared no-op context while disabled
+        ...
+    @timed("find_deadlocks")               # one flag check per call while disabled
+    def find_deadlocks(self, graph): ...
+
+    METRICS.enable()
+    METRICS.prometheus()                   # text exposition format, for a scrape endpoint or a file
+    METRICS.to_json()
+    result, report = profile_call(fn, *args)   # cProfile and tracemalloc around one call
+
+Each stage keeps a count, a sum, a maximum and cumulative histogram buckets;
+the last few observations of every stage are also kept in order for the
+UI. Gauges are read only when exported, so values that already live
+elsewhere (cache hit counts, say) cost nothing to publish.
+"""
+import bisect
+import cProfile
+import functools
+import io
+import json
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable
+
+# Upper bounds of the histogram buckets, in seconds; +Inf is implied
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+@dataclass
+class StageStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    buckets: list = field(default_factory=lambda: [0] * len(BUCKETS))  # not cumulative; see prometheus()
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class _Timer:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics: "Metrics", stage: str):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+class Metrics:
+    """Registry of stage timings, counters and gauges; safe to update from any thread"""
+
+    def __init__(self, recent: int = 50, prefix: str = "deadlock"):
+        self.enabled = False
+        self.prefix = prefix
+        self.stages = {}
+        self.counters = {}
+        self.gauges = {}
+        self.recent = deque(maxlen=recent)  # (time, stage, seconds), newest last
+        self.version = 0  # bumped by every observation, so views can skip unchanged redraws
+        self._lock = threading.Lock()
+
+    def enable(self, on: bool = True) -> None:
+        self.enabled = on
+
+    def timer(self, stage: str):
+        """Context manager timing one run of stage"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, stage)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = self.stages[stage] = StageStats()
+            stats.count += 1
+            stats.total += seconds
+            if seconds > stats.max:
+                stats.max = seconds
+            i = bisect.bisect_left(BUCKETS, seconds)  # the first bucket with seconds <= bound
+            if i < len(BUCKETS):
+                stats.buckets[i] += 1
+            self.recent.append((time.time(), stage, seconds))
+            self.version += 1
+
+    def count(self, name: str, n: int = 1) -> None:
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name: str, read: Callable[[], float]) -> None:
+        """Publish read() under name at every export"""
+        self.gauges[name] = read
+
+    def last(self, n: int) -> list[tuple[float, str, float]]:
+        with self._lock:
+            return list(self.recent)[-n:]
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+            self.recent.clear()
+            self.version += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "stages": {stage: {"count": s.count, "sum_seconds": s.total, "max_seconds": s.max,
+                                   "buckets": dict(zip(map(str, BUCKETS), s.buckets))}
+                           for stage, s in self.stages.items()},
+                "counters": dict(self.counters),
+                "gauges": {name: read() for name, read in self.gauges.items()},
+                "recent": [{"time": t, "stage": stage, "seconds": seconds} for t, stage, seconds in self.recent],
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        snapshot = self.snapshot()
+        name = f"{self.prefix}_stage_seconds"
+        lines = [f"# HELP {name} Wall time of each instrumented stage.", f"# TYPE {name} histogram"]
+        for stage, s in snapshot["stages"].items():
+            label = _label(stage)
+            cumulative = 0
+            for bound, n in s["buckets"].items():
+                cumulative += n
+                lines.append(f'{name}_bucket{{stage="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{label}",le="+Inf"}} {s["count"]}')
+            lines.append(f'{name}_sum{{stage="{label}"}} {s["sum_seconds"]!r}')
+            lines.append(f'{name}_count{{stage="{label}"}} {s["count"]}')
+        for counter, value in snapshot["counters"].items():
+            metric = f"{self.prefix}_{_metric_name(counter)}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for gauge, value in snapshot["gauges"].items():
+            metric = f"{self.prefix}_{_metric_name(gauge)}"
+            lines += [f"# TYPE {metric} gauge", f"{metric} {float(value)!r}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Export to path: JSON for a .json file, Prometheus text otherwise"""
+        text = self.to_json() if path.lower().endswith(".json") else self.prometheus()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+METRICS = Metrics()
+
+def timed(stage: str, metrics: Metrics = METRICS):
+    """Decorator timing every call of the function as stage"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return fn(*args, **kwargs)
+            with _Timer(metrics, stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+@dataclass
+class ProfileReport:
+    """What one profiled call spent its time and memory on"""
+    seconds: float
+    functions: str  # pstats listing, by cumulative time
+    peak_bytes: int = 0
+    allocations: list = field(default_factory=list)  # "file:line: size" of the biggest allocation sites
+
+    def __str__(self):
+        text = f"{self.seconds * 1e3:.1f} ms"
+        if self.allocations:
+            text += f", peak traced memory {self.peak_bytes / 1e6:.1f} MB\n"
+            text += "Largest live allocation sites:\n  " + "\n  ".join(self.allocations)
+        return text + "\n" + self.functions
+
+def profile_call(fn: Callable, *args, top: int = 25, memory: bool = True, **kwargs):
+    """Run fn once under cProfile (this thread only) and, with memory, tracemalloc; return (result, report)"""
+    tracing = memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    try:
+        result = profiler.runcall(fn, *args, **kwargs)
+    finally:
+        seconds = time.perf_counter() - start
+        snapshot = tracemalloc.take_snapshot() if tracing else None
+        peak = tracemalloc.get_traced_memory()[1] if tracing else 0
+        if tracing:
+            tracemalloc.stop()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+    allocations = []
+    if snapshot is not None:
+        allocations = [f"{s.traceback[0].filename}:{s.traceback[0].lineno}: {s.size / 1e3:.1f} kB"
+                       for s in snapshot.statistics("lineno")[:10]]
+    return result, ProfileReport(seconds, out.getvalue(), peak, allocations)
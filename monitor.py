@@ -0,0 +1,304 @@
+"""Live deadlock monitoring over a stream of lock events.
+
+Events are JSON lines such as
+    {"op": "wait", "process": "P1", "holder": "P2"}     P1 now waits on P2
+    {"op": "acquire", "process": "P1", "holder": "P2"}  P1 got it; the wait is over
+    {"op": "release", "process": "P2"}                  nobody waits on P2 any more
+    {"op": "exit", "process": "P2"}                     P2 is gone
+or the same as whitespace-separated text ("wait P1 P2"). Sources are a UNIX
+socket, a named pipe or a tailed log file; fake_events() generates a local feed.
+
+    python -m core.monitor --fake
+    python -m core.monitor --tail /var/log/locks.jsonl --cadence 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import stat
+import sys
+import time
+from typing import AsyncIterator, Callable, Iterable, Optional
+import networkx as nx
+from core.detector import DeadlockDetector
+from core.graph_manager import GraphManager
+from core.metrics import METRICS, timed
+from core.types import DeadlockComponent
+
+def parse_event(line: str) -> Optional[tuple[str, str, Optional[str]]]:
+    """Return (op, process, holder) or None for blank and malformed lines"""
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith("{"):
+        try:
+            record = json.loads(line)
+            return record["op"], str(record["process"]), record.get("holder")
+        except (ValueError, KeyError):
+            return None
+    parts = line.split()
+    if len(parts) < 2:
+        return None
+    return parts[0], parts[1], parts[2] if len(parts) > 2 else None
+
+async def tail_file(path: str, poll: float = 0.2, from_start: bool = False) -> AsyncIterator[str]:
+    """Yield lines appended to a file (or written to a named pipe) as they arrive"""
+    loop = asyncio.get_running_loop()
+    f = await loop.run_in_executor(None, open, path, "r")
+    try:
+        if not from_start and not _is_fifo(path):
+            f.seek(0, os.SEEK_END)
+        while True:
+            line = await loop.run_in_executor(None, f.readline)
+            if line:
+                yield line
+            elif _is_fifo(path):
+                return  # writer closed the pipe
+            else:
+                await asyncio.sleep(poll)
+    finally:
+        f.close()
+
+def _is_fifo(path: str) -> bool:
+    return stat.S_ISFIFO(os.stat(path).st_mode)
+
+async def unix_socket_lines(path: str) -> AsyncIterator[str]:
+    """Accept any number of writers on a UNIX socket and yield their lines"""
+    queue = asyncio.Queue()
+
+    async def handle(reader, writer):
+        while line := await reader.readline():
+            await queue.put(line.decode("utf-8", "replace"))
+        writer.close()
+
+    server = await asyncio.start_unix_server(handle, path=path)
+    async with server:
+        while True:
+            yield await queue.get()
+
+async def fake_events(processes: int = 20, rate: float = 1000.0, count: Optional[int] = None,
+                      seed: int = 0) -> AsyncIterator[str]:
+    """A local feed of plausible lock traffic that now and then closes a wait cycle"""
+    rng = random.Random(seed)
+    names = [f"P{i + 1}" for i in range(processes)]
+    waits = set()
+    sent = 0
+    while count is None or sent < count:
+        roll = rng.random()
+        if waits and roll < 0.45:
+            waiter, holder = rng.choice(sorted(waits))
+            waits.discard((waiter, holder))
+            yield json.dumps({"op": "acquire", "process": waiter, "holder": holder})
+        else:
+            waiter, holder = rng.sample(names, 2)
+            waits.add((waiter, holder))
+            yield json.dumps({"op": "wait", "process": waiter, "holder": holder})
+        sent += 1
+        await asyncio.sleep(1.0 / rate if rate else 0)
+
+class DeadlockMonitor:
+    """Batches events into a GraphManager and raises an alert for every new deadlock.
+
+    Each cycle-closing wait edge raises an alert as soon as its batch is
+    applied; with a cadence, a full find_deadlocks pass also runs every
+    cadence seconds and reports components not seen before. A reported
+    deadlock is remembered by the processes still on its cycles: removals
+    shrink or forget it, and a new cycle through any of them is the same
+    deadlock grown, so one deadlock alerts once. An error reading the
+    source is raised from run.
+    """
+
+    def __init__(self, alerts: Iterable[Callable[[str], None]] = (),
+                 graph_manager: GraphManager = None, batch_size: int = 256,
+                 batch_interval: float = 0.05, cadence: Optional[float] = None):
+        if graph_manager is None:
+            graph_manager = GraphManager()
+            graph_manager.build_from_edges([], [])
+        self.graph_manager = graph_manager
+        self.detector = DeadlockDetector()
+        self.alerts = list(alerts) or [print_alert_line]
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.cadence = cadence
+        self.events = 0
+        self.alerted = 0
+        self._reported = set()  # per reported deadlock, the processes on a cycle within that set
+        self._key_of = {}  # process -> the reported set containing it
+
+    async def run(self, source: AsyncIterator[str]) -> None:
+        queue = asyncio.Queue(maxsize=self.batch_size * 16)
+        reader = asyncio.create_task(self._read(source, queue))
+        ticker = asyncio.create_task(self._tick()) if self.cadence else None
+        try:
+            while not (reader.done() and queue.empty()):
+                batch = await self._next_batch(queue, reader)
+                self.apply(batch)
+            if not reader.cancelled():
+                reader.result()  # raises whatever ended the source early
+        finally:
+            reader.cancel()
+            if ticker:
+                ticker.cancel()
+
+    @timed("monitor_batch")
+    def apply(self, lines: list[str]) -> None:
+        manager = self.graph_manager
+        for line in lines:
+            event = parse_event(line)
+            if event is None:
+                continue
+            self.events += 1
+            op, process, holder = event
+            if op == "wait" and holder:
+                closed = manager.add_edge(process, holder)
+                if closed is not None:
+                    self._alert(closed, f"cycle closed by {process} -> {holder}")
+            elif op == "acquire" and holder:
+                manager.remove_edge(process, holder)
+                self._recheck(process, holder)
+            elif op == "release" and process in manager.graph:
+                for waiter in list(manager.graph.predecessors(process)):
+                    manager.remove_edge(waiter, process)
+                    self._recheck(waiter, process)
+            elif op == "exit":
+                manager.remove_node(process)
+                self._recheck(process)
+            if self._reported and not manager.has_deadlock():
+                # every reported deadlock has cleared; let a re-formed one alert again
+                self._reported.clear()
+                self._key_of.clear()
+        METRICS.count("events", len(lines))
+
+    @timed("monitor_sweep")
+    def sweep(self) -> None:
+        """Full pass over the current graph; reports components not alerted yet"""
+        live = set()
+        for component in self.detector.find_deadlocks(self.graph_manager.graph):
+            key = frozenset(component.processes)
+            live.add(key)
+            self._alert(component, "found by periodic sweep")
+        # a reported set always lies within one live component, so after the merges above each equals one
+        for key in self._reported - live:
+            self._forget(key)
+
+    def _alert(self, component: DeadlockComponent, reason: str) -> None:
+        key = frozenset(component.processes)
+        # every reported process is still on a cycle, so sharing one means sharing the component
+        seen = {self._key_of[p] for p in key if p in self._key_of}
+        if seen:
+            for reported in seen:
+                self._forget(reported)
+            self._remember(key.union(*seen))
+            return
+        self._remember(key)
+        self.alerted += 1
+        METRICS.count("alerts")
+        cycle = " -> ".join(f"{u} to {v}" for u, v in component.cycle)
+        message = f"Live monitor: deadlock among {', '.join(component.processes)} ({reason}); cycle: {cycle}"
+        for alert in self.alerts:
+            alert(message)
+
+    def _remember(self, key: frozenset) -> None:
+        self._reported.add(key)
+        for process in key:
+            self._key_of[process] = key
+
+    def _forget(self, key: frozenset) -> None:
+        self._reported.discard(key)
+        for process in key:
+            if self._key_of.get(process) == key:
+                del self._key_of[process]
+
+    def _recheck(self, process: str, holder: str = None) -> None:
+        """After process exited, or stopped waiting on holder, keep only what is still on a cycle within its set"""
+        key = self._key_of.get(process)
+        if key is None:
+            return
+        if holder is not None and (holder not in key or self._reaches(key, process, holder)):
+            return  # the edge was outside the set, or every cycle through it has a detour
+        self._forget(key)
+        graph = self.graph_manager.graph
+        within = graph.subgraph(p for p in key if p in graph)
+        for members in nx.strongly_connected_components(within):
+            u = next(iter(members))
+            if len(members) > 1 or within.has_edge(u, u):
+                self._remember(frozenset(members))
+
+    def _reaches(self, key: frozenset, source: str, target: str) -> bool:
+        succ = self.graph_manager.graph._succ
+        seen = {source}
+        frontier = [source]
+        while frontier:
+            # an alert may have removed processes of the set straight from the graph
+            for v in succ.get(frontier.pop(), ()):
+                if v == target:
+                    return True
+                if v in key and v not in seen:
+                    seen.add(v)
+                    frontier.append(v)
+        return False
+
+    async def _read(self, source: AsyncIterator[str], queue: asyncio.Queue) -> None:
+        async for line in source:
+            await queue.put(line)
+
+    async def _next_batch(self, queue: asyncio.Queue, reader: asyncio.Task) -> list[str]:
+        batch = []
+        deadline = time.monotonic() + self.batch_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+            if reader.done() and queue.empty():
+                break
+        return batch
+
+    async def _tick(self) -> None:
+        while True:
+            await asyncio.sleep(self.cadence)
+            self.sweep()
+
+def print_alert_line(message: str) -> None:
+    print(message, flush=True)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Watch a lock event stream and report deadlocks")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--tail", metavar="PATH", help="log file or named pipe to follow")
+    source.add_argument("--socket", metavar="PATH", help="UNIX socket to listen on")
+    source.add_argument("--fake", action="store_true", help="use the built-in fake event generator")
+    parser.add_argument("--count", type=int, help="stop the fake feed after this many events")
+    parser.add_argument("--cadence", type=float, help="seconds between full detection sweeps")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="record stage timings and write them here on exit (.json, else Prometheus text)")
+    args = parser.parse_args(argv)
+    if args.metrics:
+        METRICS.enable()
+
+    if args.tail:
+        stream = tail_file(args.tail)
+    elif args.socket:
+        stream = unix_socket_lines(args.socket)
+    else:
+        stream = fake_events(count=args.count)
+    monitor = DeadlockMonitor(cadence=args.cadence)
+    status = 0
+    try:
+        asyncio.run(monitor.run(stream))
+    except KeyboardInterrupt:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        status = 2
+    print(f"{monitor.events} events, {monitor.alerted} deadlock alerts", file=sys.stderr)
+    if args.metrics:
+        METRICS.write(args.metrics)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
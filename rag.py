@@ -0,0 +1,110 @@
+import json
+from typing import Mapping, Sequence
+import networkx as nx
+import numpy as np
+
+class ResourceAllocationGraph:
+    """Processes, multi-instance resource types and the Allocation/Request matrices between them.
+
+    allocation[i, r] is how many instances of resource r process i holds and
+    request[i, r] how many more it is waiting for; total[r] is the instance
+    count of resource r.
+    """
+
+    def __init__(self, processes: Sequence[str], resources: Sequence[str], total,
+                 allocation, request):
+        self.processes = list(processes)
+        self.resources = list(resources)
+        self.total = np.asarray(total, dtype=np.int64)
+        self.allocation = np.asarray(allocation, dtype=np.int64).reshape(len(self.processes), len(self.resources))
+        self.request = np.asarray(request, dtype=np.int64).reshape(len(self.processes), len(self.resources))
+        if self.total.shape != (len(self.resources),):
+            raise ValueError("total needs one instance count per resource")
+        if (self.allocation < 0).any() or (self.request < 0).any():
+            raise ValueError("allocation and request must be non-negative")
+        if (self.available() < 0).any():
+            raise ValueError("more instances allocated than exist")
+
+    @classmethod
+    def from_mappings(cls, total: Mapping[str, int], allocation: Mapping[str, Mapping[str, int]],
+                      request: Mapping[str, Mapping[str, int]]) -> "ResourceAllocationGraph":
+        """Build from {resource: count} and {process: {resource: count}} mappings"""
+        resources = list(total)
+        processes = list(dict.fromkeys([*allocation, *request]))
+        r_index = {r: j for j, r in enumerate(resources)}
+        alloc = np.zeros((len(processes), len(resources)), dtype=np.int64)
+        req = np.zeros_like(alloc)
+        for matrix, rows in ((alloc, allocation), (req, request)):
+            for i, p in enumerate(processes):
+                for r, count in rows.get(p, {}).items():
+                    if r not in r_index:
+                        raise ValueError(f"Unknown resource {r!r} for process {p!r}")
+                    matrix[i, r_index[r]] = count
+        return cls(processes, resources, [total[r] for r in resources], alloc, req)
+
+    @classmethod
+    def load(cls, path: str) -> "ResourceAllocationGraph":
+        """Read {"resources": {..}, "allocation": {..}, "request": {..}} JSON"""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        try:
+            return cls.from_mappings(data["resources"], data.get("allocation", {}), data.get("request", {}))
+        except KeyError as e:
+            raise ValueError(f"{path}: missing {e.args[0]!r}") from None
+
+    def release(self, processes) -> None:
+        """Preempt processes: they give back every instance they hold and stop requesting.
+
+        The matrices are replaced rather than written in place, so a detection
+        still reading the old ones on another thread is unaffected.
+        """
+        index = {p: i for i, p in enumerate(self.processes)}
+        rows = [index[p] for p in processes if p in index]
+        if not rows:
+            return
+        allocation, request = self.allocation.copy(), self.request.copy()
+        allocation[rows] = 0
+        request[rows] = 0
+        self.allocation, self.request = allocation, request
+
+    def available(self) -> np.ndarray:
+        return self.total - self.allocation.sum(axis=0)
+
+    def resources_held(self) -> np.ndarray:
+        """Instances held per process, summed over resource types"""
+        return self.allocation.sum(axis=1)
+
+    def deadlocked(self) -> np.ndarray:
+        """Multi-instance detection (work/finish vectors); returns a mask of deadlocked processes.
+
+        Each round finishes every process whose outstanding request fits in
+        work at once and returns its allocation, so the number of rounds is the
+        depth of the release order rather than the number of processes.
+        """
+        work = self.available()
+        # processes holding nothing cannot be part of a deadlock
+        finish = self.allocation.sum(axis=1) == 0
+        while True:
+            pending = np.flatnonzero(~finish)
+            if pending.size == 0:
+                break
+            runnable = pending[(self.request[pending] <= work).all(axis=1)]
+            if runnable.size == 0:
+                break
+            finish[runnable] = True
+            work = work + self.allocation[runnable].sum(axis=0)
+        return ~finish
+
+    def deadlocked_processes(self) -> list[str]:
+        return [self.processes[i] for i in np.flatnonzero(self.deadlocked())]
+
+    def wait_for_graph(self) -> nx.DiGraph:
+        """Collapse to process -> process edges: i waits on j when i requests something j holds"""
+        waits = (self.request > 0).astype(np.int32) @ (self.allocation > 0).astype(np.int32).T
+        np.fill_diagonal(waits, 0)
+        graph = nx.DiGraph()
+        graph.add_nodes_from(self.processes)
+        rows, cols = np.nonzero(waits)
+        names = self.processes
+        graph.add_edges_from((names[i], names[j]) for i, j in zip(rows.tolist(), cols.tolist()))
+        return graph
@@ -0,0 +1,441 @@
+"""Predictive deadlock risk: per-process wait-graph features and a logistic model over them.
+
+    scorer = manager.track_risk()             # kept current by every GraphManager edit
+    scores = scorer.scores(["P1", "P2"])      # probability each is deadlocked soon
+
+Features, one row per process (FEATURES):
+    waiting_on, waited_by   out- and in-degree in the wait-for graph
+    reciprocal              processes it waits on that also wait on it (nonzero only once deadlocked)
+    scc_size                size of its strongly connected component (above 1 only once deadlocked)
+    cycle_proximity         1 / (1 + wait hops to the nearest deadlocked process), 0 if none
+    wait_age                seconds its oldest outstanding wait has lasted
+
+The first four and wait_age's start time are kept per process and touched
+only for the endpoints of each change. The two structural features are
+repaired lazily from the changes since the last query: components that lost
+an edge or process are split again on their own, added edges are checked for
+the cycle they close, and wait hops are only recomputed for processes whose
+shortest path to a deadlock ran through a change. While the online detector
+knows the graph is acyclic there is nothing to repair. The model is trained
+offline with fit_history() on recorded GraphHistory sessions.
+
+    python -m core.risk --fake 20000 --out risk_model.json
+"""
+import argparse
+import json
+import sys
+import time
+from dataclasses import dataclass
+from heapq import heappop, heappush
+from typing import Callable, Sequence
+import networkx as nx
+import numpy as np
+from core.history import ADD_EDGE, CHECKPOINT, REMOVE_EDGE, GraphHistory
+
+FEATURES = ("waiting_on", "waited_by", "reciprocal", "scc_size", "cycle_proximity", "wait_age")
+# counts and ages are heavy-tailed; the model sees log1p of these columns
+_LOG_COLUMNS = [0, 1, 2, 3, 5]
+
+def design(features: np.ndarray) -> np.ndarray:
+    """Model inputs for a feature matrix"""
+    x = np.array(features, dtype=np.float64)
+    x[:, _LOG_COLUMNS] = np.log1p(np.maximum(x[:, _LOG_COLUMNS], 0))
+    return x
+
+@dataclass
+class RiskModel:
+    """Logistic regression over standardized design() columns"""
+    weights: np.ndarray
+    bias: float
+    mean: np.ndarray
+    scale: np.ndarray
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        if len(features) == 0:
+            return np.zeros(0)
+        z = (design(features) - self.mean) / self.scale @ self.weights + self.bias
+        return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+    @classmethod
+    def fit(cls, features: np.ndarray, labels: np.ndarray, epochs: int = 2000, rate: float = 0.5,
+            l2: float = 1e-3) -> "RiskModel":
+        """Full-batch gradient descent on the mean log loss; positives are weighted up to balance the classes"""
+        x = design(features)
+        y = np.asarray(labels, dtype=np.float64)
+        if len(x) != len(y) or len(x) == 0:
+            raise ValueError("need one label per feature row, and at least one row")
+        mean, scale = x.mean(axis=0), x.std(axis=0)
+        scale[scale < 1e-9] = 1.0  # constant columns
+        x = (x - mean) / scale
+        positives = y.sum()
+        weight = np.where(y > 0, (len(y) - positives) / positives, 1.0) if 0 < positives < len(y) else np.ones_like(y)
+        weight /= weight.sum()
+        w, b = np.zeros(x.shape[1]), 0.0
+        for _ in range(epochs):
+            p = 1.0 / (1.0 + np.exp(-np.clip(x @ w + b, -30, 30)))
+            error = weight * (p - y)
+            w -= rate * (x.T @ error + l2 * w)
+            b -= rate * error.sum()
+        return cls(w, float(b), mean, scale)
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"features": list(FEATURES), "weights": self.weights.tolist(), "bias": self.bias,
+                       "mean": self.mean.tolist(), "scale": self.scale.tolist()}, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "RiskModel":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("features") != list(FEATURES):
+            raise ValueError(f"{path}: model was trained on different features")
+        return cls(np.array(data["weights"]), float(data["bias"]), np.array(data["mean"]), np.array(data["scale"]))
+
+# python -m core.risk --fake 20000: fit_history on a fake_events session, AUC about 0.71 on another seed.
+# reciprocal and scc_size weigh 0 by construction, not for lack of data: fit_history only keeps rows of
+# processes not deadlocked yet, and a process that waits on a waiter of its own, or has a component of
+# more than one, already is. Both columns are constant there, so fit() gives them weight 0 and scale 1.
+# They still describe deadlocked processes in features(), whose scores() are 1 regardless.
+DEFAULT_MODEL = RiskModel(
+    weights=np.array([0.1774, 0.6566, 0.0, 0.0, 0.3254, 0.2168]),
+    bias=-0.0571,
+    mean=np.array([0.5162, 0.5431, 0.0, 0.6931, 0.0969, 0.2677]),
+    scale=np.array([0.5135, 0.5149, 1.0, 1.0, 0.1909, 0.3639]),
+)
+
+class RiskScorer:
+    """Risk scores for one GraphManager's graph, kept current change by change.
+
+    GraphManager calls edge_added, edge_removed and node_removing as it
+    edits the graph, and reset after rebuilding it or being told it was
+    edited directly.
+    """
+
+    def __init__(self, graph_manager, model: RiskModel = None, clock: Callable[[], float] = time.time):
+        self.manager = graph_manager
+        self.model = model or DEFAULT_MODEL
+        self.clock = clock
+        self.reset()
+
+    def reset(self) -> None:
+        """Start over from the manager's current graph.
+
+        Waits this scorer already saw keep their age; others take theirs
+        from the manager's history if it has one, or start now.
+        """
+        graph = self.manager.graph
+        history = self.manager.history
+        now = self.clock()
+        seen = getattr(self, "added", {})
+        known = {}
+        if history is not None and any(edge not in seen for edge in graph.edges):
+            known = edge_times(history)
+        self.added = {edge: seen[edge] if edge in seen else known.get(edge, now) for edge in graph.edges}
+        self.index = {}
+        # waiting_on, waited_by, reciprocal and the start of the oldest outstanding wait, per process id
+        self.local = np.zeros((0, 4))
+        self.dirty = set(graph)
+        # the cyclic strongly connected component of each process in one, and hops to the nearest of them
+        self.component = {}
+        self.hops = {}
+        self._stale = True  # rebuild both from scratch at the next query
+        self._added = []  # edges added since the last query
+        self._broken = set()  # components that lost an edge or process since then
+        self._raised = set()  # processes whose hops may have grown since then
+
+    def edge_added(self, u: str, v: str) -> None:
+        self.added[u, v] = self.clock()
+        self.dirty.update((u, v))
+        if not self._stale:
+            self._added.append((u, v))
+            self._check_backlog()
+
+    def edge_removed(self, u: str, v: str) -> None:
+        self.added.pop((u, v), None)
+        self.dirty.update((u, v))
+        if not self._stale:
+            component = self.component.get(u)
+            if component is not None and v in component:
+                self._broken.add(component)
+            self._raised.add(u)
+            self._check_backlog()
+
+    def node_removing(self, process: str) -> None:
+        """Called while process and its edges are still in the graph"""
+        graph = self.manager.graph
+        for waiter in graph._pred[process]:
+            self.added.pop((waiter, process), None)
+            self.dirty.add(waiter)
+        for holder in graph._succ[process]:
+            self.added.pop((process, holder), None)
+            self.dirty.add(holder)
+        self.dirty.add(process)
+        if not self._stale:
+            if process in self.component:
+                self._broken.add(self.component[process])
+            self._raised.update(graph._pred[process])
+            self._raised.add(process)  # it may come back under the same id
+            self._check_backlog()
+
+    def features(self, processes: Sequence[str]) -> np.ndarray:
+        """FEATURES for each process, one row each; processes not in the graph get zeros"""
+        self._refresh()
+        rows = np.array([self._row(p) for p in processes], dtype=np.int64)
+        local = self.local[rows] if len(rows) else np.zeros((0, 4))
+        self._repair_structure()
+        graph, component, hops = self.manager.graph, self.component, self.hops
+        out = np.zeros((len(processes), len(FEATURES)))
+        out[:, :3] = local[:, :3]
+        out[:, 3] = [len(component[p]) if p in component else 1 if p in graph else 0 for p in processes]
+        out[:, 4] = [1.0 / (1 + hops[p]) if p in hops else 0.0 for p in processes]
+        since = local[:, 3]
+        waiting = np.isfinite(since)
+        out[waiting, 5] = np.maximum(self.clock() - since[waiting], 0.0)
+        return out
+
+    def scores(self, processes: Sequence[str]) -> np.ndarray:
+        """Probability each process is deadlocked soon; 1 for those already deadlocked"""
+        features = self.features(processes)
+        scores = self.model.predict(features)
+        scores[features[:, 4] == 1.0] = 1.0
+        return scores
+
+    def _row(self, process: str) -> int:
+        i = self.index.get(process)
+        if i is None:
+            i = self.index[process] = len(self.index)
+            if i >= len(self.local):
+                grown = np.zeros((max(16, 2 * len(self.local)), 4))
+                grown[:len(self.local)] = self.local
+                grown[len(self.local):, 3] = np.inf
+                self.local = grown
+        return i
+
+    def _refresh(self) -> None:
+        graph = self.manager.graph
+        for p in self.dirty:
+            i = self._row(p)  # may grow self.local
+            row = self.local[i]
+            if p not in graph:
+                row[:] = (0, 0, 0, np.inf)
+                continue
+            succ, pred = graph._succ[p], graph._pred[p]
+            row[0] = len(succ)
+            row[1] = len(pred)
+            row[2] = sum(1 for q in succ if q in pred and q != p)
+            row[3] = min((self.added.get((p, q), np.inf) for q in succ), default=np.inf)
+        self.dirty.clear()
+
+    def _check_backlog(self) -> None:
+        # past one queued change per process a rebuild is cheaper, and the queues stop growing
+        if len(self._added) + len(self._raised) > len(self.manager.graph):
+            self._stale = True
+            self._added, self._broken, self._raised = [], set(), set()
+
+    def _repair_structure(self) -> None:
+        """Bring component and hops up to date with the changes queued since the last query"""
+        graph = self.manager.graph
+        incremental = self.manager.incremental
+        if incremental is not None and incremental.graph is graph and not incremental.has_deadlock():
+            self.component, self.hops = {}, {}
+        elif self._stale:
+            self.component, self.hops = structure_features(graph)
+        else:
+            self._repair_components(graph)
+        self._stale = False
+        self._added, self._broken, self._raised = [], set(), set()
+
+    def _repair_components(self, graph: nx.DiGraph) -> None:
+        component, hops = self.component, self.hops
+        raised = self._raised
+        # a broken component splits into cyclic components of what is left of it, or none
+        for old in self._broken:
+            for p in old:
+                del component[p]
+            remaining = [p for p in old if p in graph]
+            split, _ = structure_features(graph.subgraph(remaining), proximity=False)
+            component.update(split)
+            raised.update(p for p in remaining if p not in split)
+        # any new cycle runs through an added edge: its component is what v reaches that also reaches u
+        cyclic = []
+        for u, v in self._added:
+            if not graph.has_edge(u, v) or (u in component and v in component[u]):
+                continue
+            reached = _reach(graph._succ, v)
+            if u not in reached:
+                continue
+            merged = frozenset(_reach(graph._pred, u, within=reached))
+            component.update(dict.fromkeys(merged, merged))
+            cyclic.extend(merged)
+        # hops can only grow for processes whose shortest wait path ran through a change
+        affected = set()
+        stack = [p for p in raised if p in hops]
+        while stack:
+            p = stack.pop()
+            if p in affected:
+                continue
+            affected.add(p)
+            if p in graph:
+                d = hops[p] + 1
+                stack.extend(w for w in graph._pred[p] if hops.get(w) == d and w not in affected)
+        for p in affected:
+            del hops[p]
+        queue = []
+        for p in cyclic:
+            hops[p] = 0
+            heappush(queue, (0, p))
+        for p in affected:
+            if p not in graph:
+                continue
+            if p in component:
+                d = 0
+            else:
+                d = min((hops[q] + 1 for q in graph._succ[p] if q in hops), default=None)
+                if d is None:
+                    continue
+            if d < hops.get(p, d + 1):
+                hops[p] = d
+                heappush(queue, (d, p))
+        for u, v in self._added:
+            if v in hops and graph.has_edge(u, v) and hops[v] + 1 < hops.get(u, hops[v] + 2):
+                hops[u] = hops[v] + 1
+                heappush(queue, (hops[u], u))
+        # then shrink hops outwards, against the wait edges, from everything that just moved
+        while queue:
+            d, p = heappop(queue)
+            if hops.get(p) != d:
+                continue
+            for waiter in graph._pred[p]:
+                if d + 1 < hops.get(waiter, d + 2):
+                    hops[waiter] = d + 1
+                    heappush(queue, (d + 1, waiter))
+
+def _reach(adjacency, start, within=None) -> set:
+    # everything reachable from start along adjacency, optionally staying inside within
+    seen = {start}
+    stack = [start]
+    while stack:
+        for q in adjacency[stack.pop()]:
+            if q not in seen and (within is None or q in within):
+                seen.add(q)
+                stack.append(q)
+    return seen
+
+def structure_features(graph: nx.DiGraph, proximity: bool = True) -> tuple[dict, dict]:
+    """(cyclic strongly connected component of every process in one, wait hops from every process
+    that reaches one to the nearest)"""
+    components = {}
+    frontier = [p for p in graph if graph.has_edge(p, p)]
+    for component in nx.strongly_connected_components(graph):
+        if len(component) > 1:
+            component = frozenset(component)
+            components.update(dict.fromkeys(component, component))
+            frontier.extend(component)
+        elif graph.has_edge(*component, *component):
+            components.update(dict.fromkeys(component, frozenset(component)))
+    if not proximity:
+        return components, {}
+    # breadth-first against the wait edges: who waits, directly or through others, on a deadlock
+    hops = dict.fromkeys(frontier, 0)
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier = []
+        for holder in frontier:
+            for waiter in graph._pred[holder]:
+                if waiter not in hops:
+                    hops[waiter] = depth
+                    next_frontier.append(waiter)
+        frontier = next_frontier
+    return components, hops
+
+def edge_times(history: GraphHistory) -> dict[tuple[str, str], float]:
+    """When each edge of the latest recorded graph was added, as far back as its last rebuild"""
+    graph, added = nx.DiGraph(), {}
+    for _, stamp, op, u, v in history.replay(history.last_rebuild):
+        if op == CHECKPOINT:
+            graph, added = u, dict.fromkeys(u.edges, stamp)
+        elif op == ADD_EDGE:
+            graph.add_edge(u, v)
+            added[u, v] = stamp
+        elif op == REMOVE_EDGE:
+            graph.remove_edge(u, v)
+            added.pop((u, v), None)
+        else:
+            for edge in [*graph.in_edges(u), *graph.out_edges(u)]:
+                added.pop(edge, None)
+            graph.remove_node(u)
+    return added
+
+def fit_history(history: GraphHistory, horizon: float = 1.0, stride: int = 50) -> tuple[np.ndarray, np.ndarray]:
+    """Training rows from a recorded session: features every stride changes, labelled 1 when the
+    process, not deadlocked yet, is in a cycle at a sampled point within horizon seconds"""
+    from core.graph_manager import GraphManager  # graph_manager imports this module
+    stamp = 0.0
+    manager = GraphManager()
+    manager.build_from_edges([], [])
+    scorer = manager.track_risk(clock=lambda: stamp)
+    samples = []  # (time, processes, features, deadlocked set)
+    for version, stamp, op, u, v in history.replay():
+        if op == CHECKPOINT:
+            manager.graph = u
+            manager.processes = list(u)
+            manager.invalidate()
+        elif op == ADD_EDGE:
+            manager.add_edge(u, v)
+        elif op == REMOVE_EDGE:
+            manager.remove_edge(u, v)
+        else:
+            manager.remove_node(u)
+        if version % stride == 0:
+            processes = list(manager.graph)
+            features = scorer.features(processes)
+            stuck = {p for p, closeness in zip(processes, features[:, 4]) if closeness == 1.0}
+            samples.append((stamp, processes, features, stuck))
+    rows, labels = [], []
+    for k, (start, processes, features, stuck) in enumerate(samples):
+        soon = set()
+        for later, _, _, later_stuck in samples[k + 1:]:
+            if later - start > horizon:
+                break
+            soon |= later_stuck
+        keep = [j for j, p in enumerate(processes) if p not in stuck]
+        rows.append(features[keep])
+        labels.append([processes[j] in soon for j in keep])
+    if not rows:
+        return np.zeros((0, len(FEATURES))), np.zeros(0)
+    return np.concatenate(rows), np.concatenate(labels).astype(np.float64)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Train the deadlock-risk model on a recorded session")
+    parser.add_argument("--fake", type=int, metavar="EVENTS", required=True,
+                        help="record this many events of the built-in fake feed and train on them")
+    parser.add_argument("--processes", type=int, default=200, help="processes in the fake feed")
+    parser.add_argument("--rate", type=float, default=1000.0, help="fake events per second")
+    parser.add_argument("--horizon", type=float, default=1.0, help="seconds ahead a deadlock counts")
+    parser.add_argument("--out", default="risk_model.json")
+    args = parser.parse_args(argv)
+
+    import asyncio
+    from core.graph_manager import GraphManager
+    from core.monitor import DeadlockMonitor, fake_events
+    manager = GraphManager()
+    manager.build_from_edges([], [])
+    manager.record_history(GraphHistory(max_bytes=1 << 30))
+
+    def break_deadlocks(message: str) -> None:
+        # as a resolver would: one process of each deadlock is killed, so the graph keeps churning
+        for component in monitor.detector.find_deadlocks(manager.graph):
+            manager.remove_node(component.processes[0])
+
+    monitor = DeadlockMonitor(alerts=[break_deadlocks], graph_manager=manager)
+    asyncio.run(monitor.run(fake_events(args.processes, args.rate, args.fake)))
+    features, labels = fit_history(manager.history, args.horizon)
+    model = RiskModel.fit(features, labels)
+    model.save(args.out)
+    print(f"{len(labels)} rows, {int(labels.sum())} positive; weights {np.round(model.weights, 3).tolist()}, "
+          f"bias {model.bias:.3f}; wrote {args.out}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+from typing import Iterable
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+from PyQt6.QtGui import QBrush
+from core.graph_manager import GraphManager
+
+class WaitForTableModel(QAbstractTableModel):
+    """Adjacency-matrix view of a GraphManager's wait-for graph.
+
+    Nothing is stored per cell: the view asks only for the cells it is
+    showing, and each answer is a has_edge lookup on the sparse graph. Row
+    highlights are a set of processes plus one brush, read back through
+    BackgroundRole, so marking thousands of rows costs one repaint.
+    """
+
+    # (waiter, holder, waits) after a cell was edited in the view
+    edited = pyqtSignal(str, str, bool)
+
+    def __init__(self, manager: GraphManager, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self.marked = frozenset()
+        self.mark_brush = None
+        self.fill_brush = None
+        self.editable = True
+
+    @property
+    def processes(self) -> list[str]:
+        return self.manager.processes
+
+    def set_manager(self, manager: GraphManager, editable: bool = True) -> None:
+        """Show another graph; highlights are dropped"""
+        self.beginResetModel()
+        self.manager = manager
+        self.editable = editable
+        self.marked = frozenset()
+        self.mark_brush = self.fill_brush = None
+        self.endResetModel()
+
+    def refresh(self) -> None:
+        """Repaint after the graph was changed behind the model's back (e.g. by a resolver)"""
+        self._changed(Qt.ItemDataRole.DisplayRole)
+
+    def mark_rows(self, processes: Iterable[str], brush: QBrush) -> None:
+        self.marked = frozenset(processes)
+        self.mark_brush = brush
+        self.fill_brush = None
+        self._changed(Qt.ItemDataRole.BackgroundRole)
+
+    def fill(self, brush: QBrush) -> None:
+        self.fill_brush = brush
+        self._changed(Qt.ItemDataRole.BackgroundRole)
+
+    def clear_marks(self) -> None:
+        self.marked = frozenset()
+        self.mark_brush = self.fill_brush = None
+        self._changed(Qt.ItemDataRole.BackgroundRole)
+
+    def table_data(self) -> list[list[str]]:
+        """Every cell as "0"/"1" text; O(N^2), for small tables only"""
+        graph, processes = self.manager.graph, self.processes
+        return [["1" if graph.has_edge(p, q) else "0" for q in processes] for p in processes]
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.processes)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.processes)
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            processes = self.processes
+            return "1" if self.manager.graph.has_edge(processes[index.row()], processes[index.column()]) else "0"
+        if role == Qt.ItemDataRole.BackgroundRole:
+            if self.fill_brush is not None:
+                return self.fill_brush
+            if self.marked and self.processes[index.row()] in self.marked:
+                return self.mark_brush
+        return None
+
+    def setData(self, index: QModelIndex, value, role=Qt.ItemDataRole.EditRole) -> bool:
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole or not self.editable:
+            return False
+        text = str(value).strip()
+        if text not in ("0", "1"):
+            return False
+        waiter, holder = self.processes[index.row()], self.processes[index.column()]
+        waits = text == "1"
+        if waits == self.manager.graph.has_edge(waiter, holder):
+            return True
+        self.manager.set_edge(waiter, holder, waits)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole])
+        self.edited.emit(waiter, holder, waits)
+        return True
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        return flags | Qt.ItemFlag.ItemIsEditable if self.editable else flags
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and 0 <= section < len(self.processes):
+            return self.processes[section]
+        return None
+
+    def _changed(self, role: Qt.ItemDataRole) -> None:
+        # One range for the whole table; the view repaints only what is on screen
+        n = len(self.processes)
+        if n:
+            self.dataChanged.emit(self.index(0, 0), self.index(n - 1, n - 1), [role])
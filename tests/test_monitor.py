@@ -0,0 +1,38 @@
+from core.monitor import DeadlockMonitor
+
+def monitor():
+    alerts = []
+    return DeadlockMonitor(alerts=[alerts.append]), alerts
+
+def test_new_deadlock_alerts_after_an_overlapping_one_resolved():
+    m, alerts = monitor()
+    m.apply(["wait A B", "wait B A", "wait X Y", "wait Y X"])
+    assert len(alerts) == 2
+    # A <-> B resolves while X <-> Y keeps a deadlock alive, then A <-> C forms
+    m.apply(["acquire A B", "wait A C", "wait C A"])
+    assert len(alerts) == 3
+    assert "A, C" in alerts[-1] or "C, A" in alerts[-1]
+    m.sweep()
+    assert len(alerts) == 3
+
+def test_sweep_reports_a_deadlock_whose_overlapping_key_went_stale():
+    m, alerts = monitor()
+    m.apply(["wait A B", "wait B A", "wait X Y", "wait Y X", "acquire A B"])
+    # edited behind the monitor's back, so only the sweep can find it
+    m.graph_manager.set_edge("A", "C", True)
+    m.graph_manager.set_edge("C", "A", True)
+    m.sweep()
+    assert len(alerts) == 3
+
+def test_grown_deadlock_alerts_once():
+    m, alerts = monitor()
+    m.apply(["wait A B", "wait B C", "wait C A", "wait C D", "wait D B"])
+    m.sweep()
+    assert len(alerts) == 1
+
+def test_recheck_after_an_alert_removed_a_process():
+    m = DeadlockMonitor(alerts=[])
+    m.alerts.append(lambda message: "A, B" in message and m.graph_manager.remove_node("B"))
+    # X <-> Y keeps a deadlock alive, so the reported set of A and B is still remembered
+    m.apply(["wait X Y", "wait Y X", "wait A B", "wait B A", "acquire B A", "wait A C", "wait C A"])
+    assert m.alerted == 3
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from enum import Enum, auto
 
 class DeadlockType(Enum):
@@ -16,3 +17,54 @@ class DeadlockType(Enum):
             self.HOLD_AND_WAIT: "🔵 Hold and Wait Deadlock"
         }
         return names[self]
+
+@dataclass(frozen=True)
+class DeadlockComponent:
+    """A strongly connected set of processes that are deadlocked on each other"""
+    processes: tuple[str, ...]
+    cycle: tuple[tuple[str, str], ...]  # one representative cycle as (waiter, holder) edges
+
+    def __len__(self):
+        return len(self.processes)
+
+@dataclass(frozen=True)
+class ProcessCost:
+    """What preempting a process throws away; higher means a worse victim"""
+    priority: float = 0.0
+    work_done: float = 0.0
+    resources_held: float = 0.0
+
+    @property
+    def value(self) -> float:
+        return 1.0 + self.priority + self.work_done + self.resources_held
+
+@dataclass(frozen=True)
+class Resolution:
+    """Victims chosen to break every deadlock in one call"""
+    victims: tuple[str, ...]
+    cost: float
+    passes_saved: int  # resolve() calls replaced, less this one (see DeadlockDetector.resolve_min_cost)
+    exact: bool
+
+@dataclass(frozen=True)
+class SnapshotResult:
+    """Detection outcome for one snapshot of a batch"""
+    key: object  # index or path the snapshot was submitted under
+    deadlock_type: DeadlockType
+    deadlocks: tuple[DeadlockComponent, ...]
+    processes: int
+    edges: int
+    error: str = None  # set when the snapshot could not be read
+
+@dataclass(frozen=True)
+class LogRecord:
+    """One message shown in the message log"""
+    time: float  # seconds since the epoch
+    kind: str  # "system", "deadlock", "resolved", "info" or "chart"
+    text: str
+
+class RequestOutcome(Enum):
+    """What deadlock avoidance decided for one resource request"""
+    GRANTED = auto()
+    WAIT = auto()  # not enough free instances right now
+    UNSAFE = auto()  # granting it could lead to a deadlock
@@ -97,33 +97,42 @@ class MessageLog(QTextEdit):
         }
         self.append(f'<p style="color:{colors[message_type]}">{message}</p>')
 
-from PyQt6.QtWidgets import QTableWidget, QTableWidgetItem, QHeaderView
+from PyQt6.QtWidgets import QTableView, QHeaderView
 from PyQt6.QtGui import QBrush, QColor, QLinearGradient
+from core.graph_manager import GraphManager
+from core.table_model import WaitForTableModel
 
-class ProcessTable(QTableWidget):
-    def __init__(self):
-        super().__init__(5, 5)
+class ProcessTable(QTableView):
+    def __init__(self, size: int = 5):
+        super().__init__()
+        manager = GraphManager()
+        manager.build_from_edges([f"P{i + 1}" for i in range(size)], [])
+        self.table_model = WaitForTableModel(manager)
+        self.setModel(self.table_model)
         self.setup_table()
 
+    @property
+    def labels(self) -> list[str]:
+        return self.table_model.processes
+
     def setup_table(self):
-        self.setHorizontalHeaderLabels(["P1", "P2", "P3", "P4", "P5"])
-        self.setVerticalHeaderLabels(["P1", "P2", "P3", "P4", "P5"])
         self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        
-        for i in range(5):
-            for j in range(5):
-                self.setItem(i, j, QTableWidgetItem("0"))
+
+    def show_window(self, graph_manager, start: int = 0):
+        """Show the managed graph, however large, scrolled to process index start"""
+        self.table_model.set_manager(graph_manager)
+        mode = QHeaderView.ResizeMode.Stretch if len(self.labels) <= 20 else QHeaderView.ResizeMode.Fixed
+        self.horizontalHeader().setSectionResizeMode(mode)
+        self.verticalHeader().setSectionResizeMode(mode)
+        if 0 <= start < len(self.labels):
+            self.scrollTo(self.table_model.index(start, start), QTableView.ScrollHint.PositionAtTop)
 
     def get_table_data(self) -> list[list[str]]:
-        data = []
-        for i in range(5):
-            row = []
-            for j in range(5):
-                item = self.item(i, j)
-                row.append(item.text() if item else "0")
-            data.append(row)
-        return data
+        return self.table_model.table_data()
 
     def highlight_processes(self, processes: list[str], color_gradient: tuple[str, str]):
-        pass
+        gradient = QLinearGradient(0, 0, 100, 100)
+        gradient.setColorAt(0, QColor(color_gradient[0]))
+        gradient.setColorAt(1, QColor(color_gradient[1]))
+        self.table_model.mark_rows(processes, QBrush(gradient))
@@ -0,0 +1,94 @@
+import threading
+import traceback
+from typing import Callable
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+class TaskCancelled(Exception):
+    """Raised inside a task when its progress callback notices a cancel request"""
+
+class WorkerSignals(QObject):
+    # Emitted from the pool thread; Qt queues them onto the GUI thread
+    progress = pyqtSignal(int, str)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+class Task(QRunnable):
+    """Runs fn(report, *args) on a QThreadPool thread.
+
+    fn calls report(percent, stage) between stages; that both posts progress
+    and raises TaskCancelled once cancel() has been called, so a task stops at
+    its next stage boundary.
+    """
+
+    def __init__(self, fn: Callable, *args):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.signals = WorkerSignals()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def report(self, percent: int, stage: str):
+        if self._cancel.is_set():
+            raise TaskCancelled()
+        self.signals.progress.emit(percent, stage)
+
+    def run(self):
+        try:
+            result = self.fn(self.report, *self.args)
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+        except Exception:
+            self.signals.failed.emit(traceback.format_exc(limit=3))
+        else:
+            if self._cancel.is_set():
+                self.signals.cancelled.emit()
+            else:
+                self.signals.finished.emit(result)
+
+class TaskRunner:
+    """Keeps at most one live task; submitting a new one cancels the one in flight"""
+
+    def __init__(self, pool: QThreadPool = None):
+        self.pool = pool or QThreadPool.globalInstance()
+        self.current = None
+        # Tasks stay referenced until they report back, cancelled ones included,
+        # so Python never frees a runnable or its signals while a thread uses them
+        self.live = set()
+
+    def submit(self, fn: Callable, *args, on_finished=None, on_progress=None, on_failed=None,
+               on_cancelled=None) -> Task:
+        self.cancel()
+        task = Task(fn, *args)
+        for signal, slot in ((task.signals.finished, on_finished), (task.signals.progress, on_progress),
+                             (task.signals.failed, on_failed), (task.signals.cancelled, on_cancelled)):
+            if slot is not None:
+                signal.connect(slot)
+        task.signals.finished.connect(lambda _: self._done(task))
+        task.signals.failed.connect(lambda _: self._done(task))
+        task.signals.cancelled.connect(lambda: self._done(task))
+        task.setAutoDelete(False)
+        self.live.add(task)
+        self.current = task
+        self.pool.start(task)
+        return task
+
+    def cancel(self):
+        if self.current is not None:
+            self.current.cancel()
+            self.current = None
+
+    def busy(self) -> bool:
+        return self.current is not None
+
+    def _done(self, task: Task):
+        if self.current is task:
+            self.current = None
+        # release on the next event-loop turn, after this signal's other slots have run
+        QTimer.singleShot(0, lambda: self.live.discard(task))